@@ -0,0 +1,137 @@
+# Vazão da API JSON (utils.api): um servidor em outro processo e N clientes
+# simultâneos (threads com conexão persistente), cada um percorrendo uma lista de
+# consultas com os filtros padrão das páginas e algumas variações.
+#
+# Uso:
+#     python -m benchmarks.bench_api [--clients 1 4 16 64] [--requests 500] [--port 8601]
+#                                    [--url http://127.0.0.1:8600]
+#
+# Sem --url, sobe `python -m utils.api` na porta --port e o encerra no
+# fim; com --url, mede um servidor já em execução. Antes das medições, cada
+# consulta é feita uma vez (o cache de resultados fica quente, como num servidor
+# em uso). Para cada nível de concorrência são informados a vazão (requisições/s)
+# e os percentis p50 e p99 da latência.
+
+import argparse
+import http.client
+import itertools
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+COUNTRIES = ["Brazil", "England", "Qatar", "South Africa", "Canada", "Australia"]
+CUISINES = ["Home-made", "BBQ", "Japanese", "Brazilian", "Arabian", "American", "Italian"]
+
+STARTUP_TIMEOUT = 120
+
+
+def query(path, **params):
+    return path + "?" + urllib.parse.urlencode(params, doseq=True) if params else path
+
+
+def queries():
+    countries = [COUNTRIES, COUNTRIES[:3], ["India"], None]
+    paths = []
+    for selection in countries:
+        filters = {} if selection is None else {"country": selection}
+        paths += [
+            query("/overview", **filters),
+            query("/countries/restaurants", **filters),
+            query("/countries/cities", **filters),
+            query("/countries/mean", column="votes", **filters),
+            query("/countries/mean", column="average_cost_for_two", **filters),
+            query("/cities/restaurants", limit=10, **filters),
+            query("/cities/restaurants", measure="rating_above_4", limit=7, **filters),
+            query("/cities/cuisines", limit=10, **filters),
+            query("/cuisines/top", n=10, cuisine=CUISINES, **filters),
+        ]
+    paths += [query("/cuisines/best")]
+    paths += [query("/cuisines/rating", n=n, order=order) for n in (5, 10, 20) for order in ("best", "worst")]
+    return paths
+
+
+def wait_ready(url):
+    deadline = time.perf_counter() + STARTUP_TIMEOUT
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"{url} did not answer in {STARTUP_TIMEOUT} s")
+
+
+def client(host, port, paths, offset, count, latencies, errors):
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    cycle = itertools.islice(itertools.cycle(paths), offset, None)
+    for path in itertools.islice(cycle, count):
+        start = time.perf_counter()
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            errors.append(f"{response.status} {path}")
+    connection.close()
+
+
+def run_level(host, port, paths, clients, requests):
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(
+            target=client, args=(host, port, paths, number * 7, requests, latencies, errors)
+        )
+        for number in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput of the local JSON API.")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=500, help="requests per client")
+    parser.add_argument("--port", type=int, default=8601, help="port for the server started by the benchmark")
+    parser.add_argument("--url", help="an already running server, e.g. http://127.0.0.1:8600")
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if url is None:
+        url = f"http://127.0.0.1:{args.port}"
+        command = [sys.executable, "-m", "utils.api", "--port", str(args.port)]
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(url)
+        parsed = urllib.parse.urlsplit(url)
+        paths = queries()
+        run_level(parsed.hostname, parsed.port, paths, 1, len(paths))
+        print(f"{len(paths)} distinct queries, {args.requests} requests per client")
+        for clients in args.clients:
+            seconds, latencies, errors = run_level(parsed.hostname, parsed.port, paths, clients, args.requests)
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            print(
+                f"{clients:>4} clients  {len(latencies):>6} requests in {seconds:6.2f} s"
+                f"  {len(latencies) / seconds:8.0f} req/s  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms"
+                f"  {len(errors)} errors"
+            )
+            for error in errors[:3]:
+                print(f"      error: {error}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Tempo de partida a frio de cada página: um servidor Streamlit novo (streamlit run
+# em modo headless) por página, com a página como script principal, e um cliente
+# websocket que pede a primeira execução, como o navegador faz ao abrir o app.
+#
+# Uso:
+#     python -m benchmarks.bench_cold_start [--pages 01_📊Main_Page.py pages/02_🌎Countries.py ...]
+#                                           [--repeat 3] [--port 8599]
+#
+# Para cada página são medidos, em mediana sobre --repeat servidores: o tempo até
+# o servidor responder ao health check; o tempo desde o pedido da execução até o
+# primeiro elemento desenhado (a primeira mensagem delta com um elemento novo);
+# até o fim da execução; e, para comparação, o fim de uma segunda execução no
+# mesmo servidor, já com os imports e os caches de processo prontos.
+
+import argparse
+import asyncio
+import glob
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+PAGES = ["01_📊Main_Page.py"] + sorted(glob.glob("pages/*.py"))
+
+STARTUP_TIMEOUT = 60
+RUN_TIMEOUT = 120
+
+
+def start_server(page, port, env=None):
+    # env: variáveis de ambiente a mais para o servidor.
+    command = [
+        sys.executable, "-m", "streamlit", "run", page,
+        "--server.headless", "true",
+        "--server.port", str(port),
+        "--server.fileWatcherType", "none",
+        "--browser.gatherUsageStats", "false",
+    ]
+    return subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env={**os.environ, **(env or {})}
+    )
+
+
+def wait_ready(port):
+    deadline = time.perf_counter() + STARTUP_TIMEOUT
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"server on port {port} did not start in {STARTUP_TIMEOUT} s")
+
+
+async def rerun(connection):
+    # Devolve (segundos até o primeiro elemento, segundos até o fim da execução).
+    message = BackMsg()
+    message.rerun_script.query_string = ""
+    start = time.perf_counter()
+    await connection.write_message(message.SerializeToString(), binary=True)
+    first_element = None
+    while True:
+        data = await asyncio.wait_for(connection.read_message(), RUN_TIMEOUT)
+        if data is None:
+            raise ConnectionError("server closed the connection")
+        forward = ForwardMsg.FromString(data)
+        kind = forward.WhichOneof("type")
+        if kind == "delta" and first_element is None and forward.delta.WhichOneof("type") == "new_element":
+            first_element = time.perf_counter() - start
+        if kind == "script_finished":
+            return first_element, time.perf_counter() - start
+
+
+async def measure_page(page, port):
+    start = time.perf_counter()
+    server = start_server(page, port)
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, wait_ready, port)
+        ready = time.perf_counter() - start
+        connection = await websocket_connect(f"ws://localhost:{port}/_stcore/stream")
+        first_element, finished = await rerun(connection)
+        _, warm = await rerun(connection)
+        connection.close()
+    finally:
+        server.terminate()
+        server.wait()
+    return {"ready": ready, "first_element": first_element, "finished": finished, "warm": warm}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold start time to first element per page.")
+    parser.add_argument("--pages", nargs="+", default=PAGES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8599)
+    args = parser.parse_args(argv)
+
+    print(f"{os.cpu_count()} CPUs, median of {args.repeat} cold servers per page")
+    for page in args.pages:
+        runs = [asyncio.run(measure_page(page, args.port)) for _ in range(args.repeat)]
+        median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(
+            f"{page:<32} server ready {median['ready']:6.2f} s  first element {median['first_element'] * 1000:7.0f} ms"
+            f"  finished {median['finished'] * 1000:7.0f} ms  |  warm rerun {median['warm'] * 1000:6.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# Compara a deduplicação por (restaurant_id, fingerprint) de utils.dedup com o
+# drop_duplicates sobre todas as colunas, e confere que as duas mantêm as mesmas
+# linhas com a política keep_all.
+#
+# Uso:
+#     python -m benchmarks.bench_dedup [--rows 1000000 5000000] [--conflicts 0.01] [--repeat 3]
+#
+# Além das linhas repetidas do arquivo original, uma fração --conflicts das linhas
+# é duplicada com outra nota, gerando restaurant_id em conflito.
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_transform import synthetic_raw, timeit
+from utils.data import RAW_DATA_PATH
+from utils.dedup import deduplicate
+
+ID_COLUMN = "Restaurant ID"
+
+
+def with_conflicts(raw, fraction, rng):
+    changed = raw.iloc[rng.choice(len(raw), int(len(raw) * fraction), replace=False)].copy()
+    changed["Aggregate rating"] = changed["Aggregate rating"] + 0.1
+    return pd.concat([raw, changed], ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fingerprint dedup vs drop_duplicates benchmark.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--conflicts", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    raw = pd.read_csv(RAW_DATA_PATH)
+    for rows in args.rows:
+        df = with_conflicts(synthetic_raw(raw, rows), args.conflicts, rng)
+
+        legacy_seconds, legacy = timeit(lambda frame: frame.drop_duplicates(), df, args.repeat)
+        keep_all_seconds, (kept, stats) = timeit(lambda frame: deduplicate(frame, ID_COLUMN), df, args.repeat)
+        assert kept.index.equals(legacy.index)
+        first_seconds, (_, first) = timeit(lambda frame: deduplicate(frame, ID_COLUMN, "first"), df, args.repeat)
+
+        print(
+            f"{len(df):>11,} rows  drop_duplicates {legacy_seconds:7.2f} s  |  keep_all {keep_all_seconds:7.2f} s"
+            f" ({legacy_seconds / keep_all_seconds:4.1f}x)  first {first_seconds:7.2f} s"
+            f"  |  {stats['exact_duplicates']:,} duplicates, {stats['conflicting_keys']:,} conflicting ids,"
+            f" {first['conflict_rows_dropped']:,} dropped by first"
+        )
+        del df, legacy, kept
+
+
+if __name__ == "__main__":
+    main()
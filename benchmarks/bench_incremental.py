@@ -0,0 +1,91 @@
+# Compara a atualização incremental (utils.incremental) com o build completo
+# (utils.etl) para snapshots com uma fração das linhas alterada, e a atualização
+# do cubo de agregados pelo delta com a reconstrução a partir do dataset inteiro.
+#
+# Uso:
+#     python -m benchmarks.bench_incremental [--rows 500000] [--changes 0.001 0.01 0.1]
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_transform import synthetic_raw
+from utils.cube import build_cube, update_cube
+from utils.data import RAW_DATA_PATH, artifact_paths, read_feather
+from utils.etl import build
+from utils.incremental import refresh
+
+
+def snapshot(raw, fraction, rng):
+    # Altera a nota de fraction das linhas, remove e insere fraction / 2 cada.
+    raw = raw.copy()
+    count = int(len(raw) * fraction)
+    changed = rng.choice(len(raw), count, replace=False)
+    raw.iloc[changed, raw.columns.get_loc("Aggregate rating")] = 1.0
+    raw = raw.drop(raw.index[rng.choice(len(raw), count // 2, replace=False)])
+    inserted = raw.sample(count // 2, random_state=0)
+    inserted["Restaurant ID"] = raw["Restaurant ID"].max() + 1 + np.arange(len(inserted))
+    return pd.concat([raw, inserted], ignore_index=True)
+
+
+def quiet(function, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        function(*args)
+        return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incremental refresh vs full rebuild benchmark.")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--changes", type=float, nargs="+", default=[0.001, 0.01, 0.1])
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    raw = synthetic_raw(pd.read_csv(RAW_DATA_PATH), args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "base.csv")
+        raw.to_csv(base, index=False)
+        print(f"{args.rows:,} raw rows")
+
+        for fraction in args.changes:
+            source, output_dir = os.path.join(tmp, "zomato.csv"), os.path.join(tmp, "out")
+            shutil.copyfile(base, source)
+            shutil.rmtree(output_dir, ignore_errors=True)
+            os.makedirs(output_dir)
+            quiet(build, source, output_dir)
+            cube = build_cube(read_feather(artifact_paths(output_dir)["feather"]))
+            # Primeira atualização (calcula os hashes a partir do CSV bruto antigo e os
+            # grava); a medida é a segunda.
+            new = os.path.join(tmp, "snapshot.csv")
+            snapshot(raw, 1 / len(raw), rng).to_csv(new, index=False)
+            quiet(refresh, new, source, output_dir)
+
+            snapshot(raw, fraction, rng).to_csv(new, index=False)
+            refresh_seconds = quiet(refresh, new, source, output_dir)
+            delta = read_feather(artifact_paths(output_dir)["delta"])
+
+            start = time.perf_counter()
+            update_cube(cube, delta)
+            update_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            build_cube(read_feather(artifact_paths(output_dir)["feather"]))
+            rebuild_seconds = time.perf_counter() - start
+
+            full_seconds = quiet(build, source, output_dir, True)
+            print(
+                f"{fraction:>6.1%} changed ({len(delta):>7,} delta rows)  refresh {refresh_seconds:6.2f} s"
+                f"  |  full build {full_seconds:6.2f} s  |  cube update {update_seconds * 1000:7.1f} ms"
+                f" vs rebuild {rebuild_seconds * 1000:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
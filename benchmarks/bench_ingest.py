@@ -0,0 +1,74 @@
+# Compara o pico de memória e a vazão do tratamento em uma única leitura
+# (process_data) com a ingestão em blocos (utils.ingest), sobre um CSV bruto
+# sintético com o schema do zomato.csv. Cada modo roda num processo separado
+# para que o pico de memória de um não contamine o outro. O pico é o VmHWM de
+# /proc/self/status (Linux): ao contrário de ru_maxrss, ele não herda o pico do
+# processo pai, que montou o CSV sintético em memória.
+#
+# Uso:
+#     python -m benchmarks.bench_ingest [--rows 1000000] [--chunk-size 100000]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+from benchmarks.bench_transform import synthetic_raw
+from utils.data import RAW_DATA_PATH
+
+PEAK_KB = "int(next(line.split()[1] for line in open('/proc/self/status') if line.startswith('VmHWM')))"
+
+# Código executado em cada subprocesso; imprime um JSON com o resultado.
+RUNNERS = {
+    "full": (
+        "import json, time\n"
+        "from utils.data import process_data\n"
+        "start = time.perf_counter()\n"
+        "rows = len(process_data({source!r}))\n"
+        "print(json.dumps({{'rows': rows, 'seconds': time.perf_counter() - start,\n"
+        "    'peak_kb': " + PEAK_KB + "}}))\n"
+    ),
+    "chunked": (
+        "import contextlib, io, json, time\n"
+        "from utils.ingest import ingest\n"
+        "start = time.perf_counter()\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    manifest = ingest({source!r}, {output_dir!r}, {chunk_size})\n"
+        "print(json.dumps({{'rows': manifest['rows'], 'seconds': time.perf_counter() - start,\n"
+        "    'peak_kb': " + PEAK_KB + "}}))\n"
+    ),
+}
+
+
+def run(mode, **params):
+    code = RUNNERS[mode].format(**params)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Full vs chunked ingestion memory benchmark.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "zomato.csv")
+        synthetic_raw(pd.read_csv(RAW_DATA_PATH), args.rows).to_csv(source, index=False)
+        size_mb = os.path.getsize(source) / 1e6
+        print(f"{args.rows:,} raw rows ({size_mb:,.0f} MB)")
+
+        for mode in RUNNERS:
+            result = run(mode, source=source, output_dir=os.path.join(tmp, "parts"), chunk_size=args.chunk_size)
+            print(
+                f"{mode:>8}  {result['rows']:>10,} rows  {result['seconds']:7.2f} s  "
+                f"{args.rows / result['seconds']:>10,.0f} rows/s  peak RSS {result['peak_kb'] / 1024:7,.0f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Compara o mapa original (um folium.Marker com Popup por restaurante) com o
+# mapa compacto (pontos em um único JSON, clusters e popups no navegador):
+# tempo para montar e renderizar o HTML e tamanho do HTML enviado.
+#
+# Uso:
+#     python -m benchmarks.bench_map [--rows 7000 100000 1000000] [--legacy-max-rows 100000]
+#
+# O mapa original fica muito lento acima de ~100 mil pontos; acima de
+# --legacy-max-rows ele não é medido.
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.data import load_data
+from utils.maps import cluster_map, marker_map
+
+
+def synthetic_points(df, rows, seed=0):
+    # Replica o dataset tratado com um pequeno deslocamento nas coordenadas.
+    rng = np.random.default_rng(seed)
+    copies = -(-rows // len(df))
+    points = pd.concat([df] * copies, ignore_index=True).head(rows)
+    points["latitude"] = points["latitude"] + rng.normal(0, 0.01, rows)
+    points["longitude"] = points["longitude"] + rng.normal(0, 0.01, rows)
+    return points
+
+
+def measure(build, df):
+    start = time.perf_counter()
+    html = build(df).get_root().render()
+    return time.perf_counter() - start, len(html.encode("utf-8"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Map build time and payload benchmark.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[7_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max-rows", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    df = load_data()
+    for rows in args.rows:
+        points = synthetic_points(df, rows)
+        seconds, size = measure(cluster_map, points)
+        line = f"{rows:>10,} points  compact {seconds:7.2f} s {size / 1e6:8.1f} MB"
+        if rows <= args.legacy_max_rows:
+            legacy_seconds, legacy_size = measure(marker_map, points)
+            line += (
+                f"  |  markers {legacy_seconds:7.2f} s {legacy_size / 1e6:8.1f} MB"
+                f"  ({legacy_seconds / seconds:.0f}x time, {legacy_size / size:.0f}x bytes)"
+            )
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
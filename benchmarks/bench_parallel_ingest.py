@@ -0,0 +1,58 @@
+# Escalabilidade da ingestão paralela (utils.ingest com --workers): o mesmo
+# conjunto de arquivos regionais sintéticos é tratado com 1, 2, 4... processos.
+# Com --files 1, mede a divisão de um único dump em trechos entre os workers. O
+# ganho é limitado pelo número de núcleos da máquina (os.cpu_count()).
+#
+# Uso:
+#     python -m benchmarks.bench_parallel_ingest [--rows 1000000] [--files 4] [--workers 1 2 4]
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_transform import synthetic_raw
+from utils.data import RAW_DATA_PATH
+from utils.ingest import DEFAULT_CHUNK_SIZE, ingest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel ingestion scaling benchmark.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = synthetic_raw(pd.read_csv(RAW_DATA_PATH), args.rows)
+        sources = []
+        bounds = np.linspace(0, len(raw), args.files + 1).astype(int)
+        for number, (first, last) in enumerate(zip(bounds[:-1], bounds[1:])):
+            part = raw.iloc[first:last]
+            path = os.path.join(tmp, f"region-{number}.csv")
+            part.to_csv(path, index=False)
+            sources.append(path)
+        del raw
+
+        print(f"{args.rows:,} raw rows in {args.files} files, {os.cpu_count()} CPUs")
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                manifest = ingest(sources, os.path.join(tmp, "parts"), args.chunk_size, workers)
+            seconds = time.perf_counter() - start
+            baseline = baseline or seconds
+            print(
+                f"{workers:>3} workers  {manifest['rows']:>10,} rows kept  {seconds:7.2f} s"
+                f"  {args.rows / seconds:>10,.0f} rows/s  speedup {baseline / seconds:4.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Compara a leitura do dataset completo seguida do filtro de países com a
+# leitura apenas das partições dos países escolhidos (utils.data.read_partitions),
+# sobre uma cópia ampliada do dataset tratado.
+#
+# Uso:
+#     python -m benchmarks.bench_partitions [--rows 7000 1000000] [--countries Brazil Qatar]
+
+import argparse
+import os
+import tempfile
+import time
+
+from pyarrow import feather
+
+from benchmarks.bench_map import synthetic_points
+from utils.data import load_data, read_feather, read_partitions
+from utils.etl import write_country_partitions
+
+
+def best_of(function, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Country partition pushdown benchmark.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[7_000, 1_000_000])
+    parser.add_argument("--countries", nargs="+", default=["Brazil", "Qatar"])
+    args = parser.parse_args(argv)
+
+    df = load_data()
+    with tempfile.TemporaryDirectory() as tmp:
+        full_path = os.path.join(tmp, "processed.feather")
+        partitions_path = os.path.join(tmp, "processed_by_country.arrow")
+        for rows in args.rows:
+            points = synthetic_points(df, rows)
+            feather.write_feather(points, full_path, compression="uncompressed")
+            write_country_partitions(points, partitions_path)
+
+            def full_scan():
+                data = read_feather(full_path)
+                return data.loc[data["country"].isin(args.countries), :]
+
+            full_seconds, expected = best_of(full_scan)
+            pushdown_seconds, result = best_of(lambda: read_partitions(partitions_path, args.countries))
+            assert len(result) == len(expected)
+            print(
+                f"{rows:>10,} rows, {len(result):>8,} selected  full read + filter {full_seconds * 1000:8.1f} ms"
+                f"  |  partitions {pushdown_seconds * 1000:8.1f} ms ({full_seconds / pushdown_seconds:.1f}x)"
+                f"  |  {result.memory_usage(deep=True).sum() / 1e6:6.1f} MB in memory"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Memória por coluna do dataset tratado antes e depois do SCHEMA compacto, e o
+# tempo dos filtros/agrupamentos usados pelas páginas nos dois formatos.
+#
+# Uso:
+#     python -m benchmarks.bench_schema [--scale 1 10] [--repeat 5]
+
+import argparse
+import statistics
+import time
+
+import pandas as pd
+
+from utils.data import RAW_DATA_PATH, apply_schema, memory_report, process_data
+
+COUNTRY_OPTIONS = ["Brazil", "England", "Qatar", "South Africa", "Canada", "Australia"]
+
+
+def timeit(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def page_queries(df):
+    return {
+        "isin country": lambda: df.loc[df["country"].isin(COUNTRY_OPTIONS), :],
+        "groupby country mean": lambda: df.loc[:, ["votes", "country"]].groupby("country", observed=True).mean(),
+        "groupby country/city count": lambda: df.loc[:, ["country", "restaurant_id", "city"]]
+        .groupby(["country", "city"], observed=True)
+        .count(),
+        "groupby cuisines mean": lambda: df.loc[:, ["cuisines", "aggregate_rating"]]
+        .groupby("cuisines", observed=True)
+        .mean(),
+    }
+
+
+def run(scale, repeat, base):
+    before = pd.concat([base] * scale, ignore_index=True)
+    after = apply_schema(before)
+
+    print(f"\n{len(before):,} rows")
+    report = memory_report(before, after)
+    print(report.to_string(formatters={"ratio": "{:.1f}x".format}))
+
+    before_queries, after_queries = page_queries(before), page_queries(after)
+    print()
+    for name in before_queries:
+        seconds_before = timeit(before_queries[name], repeat)
+        seconds_after = timeit(after_queries[name], repeat)
+        print(
+            f"  {name:<28} {seconds_before * 1000:8.1f} ms -> {seconds_after * 1000:8.1f} ms"
+            f"  {seconds_before / seconds_after:5.1f}x"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact schema memory and query benchmark.")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    base = process_data(RAW_DATA_PATH).reset_index(drop=True)
+    for scale in args.scale:
+        run(scale, args.repeat, base)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# Teste de carga do dashboard sem navegador: um único servidor Streamlit
+# (streamlit run em modo headless, como em bench_cold_start) e N sessões
+# simultâneas, cada uma um cliente websocket, como uma aba do navegador. As
+# sessões são distribuídas entre as páginas em rodízio; cada uma abre sua página
+# e em seguida muda um filtro sorteado da barra lateral (multiselect, slider,
+# selectbox ou radio) com um valor aleatório, medindo o tempo de cada rerun.
+#
+# Uso:
+#     python -m benchmarks.bench_sessions [--sessions 1 2 4 8] [--reruns 10] [--seed 0]
+#                                         [--pages 01_📊Main_Page.py pages/02_🌎Countries.py ...]
+#                                         [--port 8598]
+#
+# Todas as sessões disputam o mesmo processo: os mesmos caches (utils.data,
+# utils.results, utils.figures), a mesma memória e o mesmo GIL. Antes das
+# medições, cada página roda uma vez, para que os caches de processo já estejam
+# preenchidos, como num servidor em uso.
+#
+# Para cada nível de concorrência são informados os percentis (p50, p90, p99) do
+# tempo de rerun por página, visto pelo cliente, e a mediana do tempo do rerun no
+# servidor (FOME_ZERO_TIMING_LOG, ver utils.timing): a diferença é a espera na
+# fila do servidor. Também são informados a vazão (reruns/s), o RSS do servidor
+# (no início e o pico durante o nível) e quantos reruns tiveram falta nos caches
+# de processo, de resultados e de figuras. Quando a vazão para de crescer com
+# mais sessões e a espera cresce, o servidor saturou.
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from streamlit.source_util import page_icon_and_name
+from tornado.websocket import websocket_connect
+
+from benchmarks.bench_cold_start import start_server, wait_ready
+from utils.timing import TIMING_LOG_ENV
+
+PAGES = ["01_📊Main_Page.py"] + sorted(glob.glob("pages/*.py"))
+
+WIDGET_KINDS = ["multiselect", "slider", "selectbox", "radio"]
+
+# Quantidade máxima de opções marcadas num multiselect sorteado.
+MAX_SELECTED = 8
+
+# Spans de utils.timing abertos quando um valor não estava no cache.
+MISS_SPANS = {"process": "cache_miss:", "results": "result_miss:", "figures": "figure_miss:"}
+
+RERUN_TIMEOUT = 120
+RSS_SAMPLE_SECONDS = 0.1
+
+# Raiz da barra lateral no delta_path das mensagens (a raiz 0 é a área principal).
+SIDEBAR = 1
+
+
+def memory_kb(pid, field):
+    # VmRSS (atual) ou VmHWM (pico) do processo, em kB.
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def page_name(page):
+    # O nome com que o servidor encontra a página (o mesmo da URL).
+    return page_icon_and_name(Path(page))[1]
+
+
+async def rerun(connection, page, widget_states):
+    # Pede uma execução da página com os valores dos widgets, como o navegador.
+    # Devolve (segundos até o fim da execução, widgets da barra lateral, erros).
+    message = BackMsg()
+    message.rerun_script.page_name = page_name(page)
+    message.rerun_script.widget_states.widgets.extend(widget_states.values())
+    start = time.perf_counter()
+    await connection.write_message(message.SerializeToString(), binary=True)
+    widgets, errors = [], []
+    while True:
+        data = await asyncio.wait_for(connection.read_message(), RERUN_TIMEOUT)
+        if data is None:
+            raise ConnectionError("server closed the connection")
+        forward = ForwardMsg.FromString(data)
+        kind = forward.WhichOneof("type")
+        if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+            element = forward.delta.new_element
+            element_kind = element.WhichOneof("type")
+            if element_kind == "exception":
+                errors.append(f"{page}: {element.exception.type}: {element.exception.message}")
+            elif element_kind in WIDGET_KINDS and forward.metadata.delta_path[0] == SIDEBAR:
+                widgets.append((getattr(element, element_kind), element_kind))
+        elif kind == "page_not_found":
+            raise ValueError(f"the server has no page named {page_name(page)!r}")
+        elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+            return time.perf_counter() - start, widgets, errors
+
+
+def random_state(widget, kind, rng):
+    # O WidgetState que o navegador envia para um valor aleatório do widget.
+    state = WidgetState(id=widget.id)
+    if kind == "multiselect":
+        count = int(rng.integers(1, min(len(widget.options), MAX_SELECTED) + 1))
+        state.int_array_value.data.extend(sorted(int(i) for i in rng.choice(len(widget.options), count, replace=False)))
+    elif kind == "slider":
+        steps = int(round((widget.max - widget.min) / widget.step))
+        values = sorted(widget.min + int(rng.integers(0, steps + 1)) * widget.step for _ in widget.default)
+        state.double_array_value.data.extend(round(value, 6) for value in values)
+    else:
+        state.int_value = int(rng.integers(0, len(widget.options)))
+    return state
+
+
+async def session(port, page, reruns, seed):
+    rng = np.random.default_rng(seed)
+    latencies, errors = [], []
+    widget_states = {}
+    connection = await websocket_connect(f"ws://localhost:{port}/_stcore/stream")
+    try:
+        for _ in range(reruns):
+            seconds, widgets, rerun_errors = await rerun(connection, page, widget_states)
+            latencies.append(seconds)
+            errors.extend(rerun_errors)
+            # Os ids dos widgets dependem das opções: um widget que mudou de opções
+            # (as cidades dos países escolhidos, por exemplo) volta ao padrão.
+            ids = {widget.id for widget, _ in widgets}
+            widget_states = {id: state for id, state in widget_states.items() if id in ids}
+            if widgets:
+                widget, kind = widgets[int(rng.integers(0, len(widgets)))]
+                widget_states[widget.id] = random_state(widget, kind, rng)
+    finally:
+        connection.close()
+    return page, latencies, errors
+
+
+async def sample_rss(pid, samples):
+    while True:
+        samples.append(memory_kb(pid, "VmRSS"))
+        await asyncio.sleep(RSS_SAMPLE_SECONDS)
+
+
+async def run_level(port, pid, pages, sessions, reruns, seed):
+    rss = []
+    sampler = asyncio.create_task(sample_rss(pid, rss))
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(session(port, pages[number % len(pages)], reruns, seed + number) for number in range(sessions))
+    )
+    seconds = time.perf_counter() - start
+    sampler.cancel()
+
+    latencies = {page: [] for page in pages}
+    errors = []
+    for page, times, session_errors in results:
+        latencies[page].extend(times)
+        errors.extend(session_errors)
+    return seconds, latencies, errors, rss
+
+
+def read_timing_log(path, offset):
+    # Reruns registrados pelo servidor a partir de offset, e o novo offset.
+    with open(path, encoding="utf-8") as f:
+        f.seek(offset)
+        lines = f.readlines()
+        return [json.loads(line) for line in lines], f.tell()
+
+
+def server_summary(records):
+    # Mediana do tempo de rerun no servidor por nome de página, e quantos reruns
+    # tiveram falta em cada cache.
+    totals = {}
+    for record in records:
+        totals.setdefault(record["page"], []).append(record["total_ms"])
+    misses = {
+        cache: sum(any(span["name"].startswith(prefix) for span in record["spans"]) for record in records)
+        for cache, prefix in MISS_SPANS.items()
+    }
+    return {page: np.median(times) for page, times in totals.items()}, misses
+
+
+def report(sessions, seconds, latencies, errors, rss, records):
+    total = sum(len(times) for times in latencies.values())
+    server_ms, misses = server_summary(records)
+    print(
+        f"{sessions:>3} sessions  {total:>5} reruns in {seconds:7.2f} s  {total / seconds:7.2f} reruns/s"
+        f"  server RSS {rss[0] / 1024:6.0f} MB -> peak {max(rss) / 1024:6.0f} MB  {len(errors)} errors"
+    )
+    print("      reruns with cache misses: " + ", ".join(f"{cache} {count}" for cache, count in misses.items()))
+    for page, times in latencies.items():
+        if times:
+            p50, p90, p99 = np.percentile(times, [50, 90, 99]) * 1000
+            # O timing log registra a página pelo nome passado a start_rerun ("main").
+            server = [ms for name, ms in server_ms.items() if name in page_name(page).lower()]
+            server_text = f"  server p50 {server[0]:8.1f} ms" if len(server) == 1 else ""
+            print(
+                f"      {page:<32} {len(times):>5} reruns  p50 {p50:8.1f} ms  p90 {p90:8.1f} ms"
+                f"  p99 {p99:8.1f} ms{server_text}"
+            )
+    for error in errors[:3]:
+        print(f"      error: {error}")
+
+
+async def benchmark(args, timing_log):
+    server = start_server(PAGES[0], args.port, env={TIMING_LOG_ENV: timing_log})
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, wait_ready, args.port)
+        # Uma execução de cada página, em sessões próprias, preenche os caches.
+        await asyncio.gather(*(session(args.port, page, 1, args.seed) for page in args.pages))
+        _, offset = read_timing_log(timing_log, 0)
+        print(
+            f"{os.cpu_count()} CPUs, one server, warmed up {len(args.pages)} pages,"
+            f" server RSS {memory_kb(server.pid, 'VmRSS') / 1024:.0f} MB"
+        )
+
+        for sessions in args.sessions:
+            seconds, latencies, errors, rss = await run_level(
+                args.port, server.pid, args.pages, sessions, args.reruns, args.seed
+            )
+            records, offset = read_timing_log(timing_log, offset)
+            report(sessions, seconds, latencies, errors, rss, records)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent sessions against one Streamlit server.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--reruns", type=int, default=10, help="reruns per session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pages", nargs="+", default=PAGES)
+    parser.add_argument("--port", type=int, default=8598)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        timing_log = os.path.join(directory, "timing.jsonl")
+        open(timing_log, "w").close()
+        asyncio.run(benchmark(args, timing_log))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Compara as consultas do índice espacial (utils.spatial) com o cálculo da
+# distância para todas as linhas: tempo médio por consulta de raio e dos k mais
+# próximos, a partir de pontos sorteados entre os restaurantes.
+#
+# Uso:
+#     python -m benchmarks.bench_spatial [--rows 7000 1000000 5000000] [--queries 200]
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_map import synthetic_points
+from utils.data import load_data
+from utils.spatial import build_spatial, haversine, nearest, within_radius
+
+
+def brute_force(df, latitude, longitude, k):
+    distances = haversine(
+        np.radians(latitude), np.radians(longitude),
+        np.radians(df["latitude"].to_numpy()), np.radians(df["longitude"].to_numpy()),
+    )
+    rows = np.argpartition(distances, k)[:k]
+    return rows[np.argsort(distances[rows])]
+
+
+def per_query(function, points):
+    start = time.perf_counter()
+    for latitude, longitude in points:
+        function(latitude, longitude)
+    return (time.perf_counter() - start) / len(points) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Spatial index query benchmark.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[7_000, 1_000_000, 5_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius-km", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    df = load_data()
+    rng = np.random.default_rng(0)
+    for rows in args.rows:
+        points_df = synthetic_points(df, rows)
+        sample = rng.integers(0, rows, args.queries)
+        points = list(zip(points_df["latitude"].to_numpy()[sample], points_df["longitude"].to_numpy()[sample]))
+
+        start = time.perf_counter()
+        spatial = build_spatial(points_df)
+        build_seconds = time.perf_counter() - start
+
+        radius_ms = per_query(lambda lat, lon: within_radius(spatial, lat, lon, args.radius_km), points)
+        knn_ms = per_query(lambda lat, lon: nearest(spatial, lat, lon, args.k), points)
+        brute_ms = per_query(lambda lat, lon: brute_force(points_df, lat, lon, args.k), points[:20])
+        print(
+            f"{rows:>10,} rows  build {build_seconds:6.2f} s  |  radius {args.radius_km:g} km {radius_ms:8.3f} ms"
+            f"  |  {args.k}-nearest {knn_ms:8.3f} ms  |  full scan {brute_ms:8.2f} ms ({brute_ms / knn_ms:.0f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
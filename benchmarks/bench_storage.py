@@ -0,0 +1,69 @@
+# Compara a leitura do dataset tratado em CSV com a leitura em Arrow IPC (feather)
+# via memory map, com e sem projeção de colunas.
+#
+# Uso:
+#     python -m benchmarks.bench_storage [--scale 1 10 100] [--repeat 5]
+#
+# --scale replica as linhas do dataset tratado para simular dumps maiores.
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+from pyarrow import feather
+
+from utils.data import RAW_DATA_PATH, process_data, read_feather
+
+# Colunas lidas pela página Countries.
+COUNTRY_COLUMNS = ["restaurant_id", "country", "city", "average_cost_for_two", "votes"]
+
+
+def timeit(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def run(scale, repeat, base):
+    df = pd.concat([base] * scale, ignore_index=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "processed.csv")
+        feather_path = os.path.join(tmp, "processed.feather")
+        df.to_csv(csv_path, index=False)
+        feather.write_feather(df, feather_path, compression="uncompressed")
+
+        cases = {
+            "csv": lambda: pd.read_csv(csv_path),
+            "csv (usecols)": lambda: pd.read_csv(csv_path, usecols=COUNTRY_COLUMNS),
+            "feather mmap": lambda: read_feather(feather_path),
+            "feather mmap (columns)": lambda: read_feather(feather_path, COUNTRY_COLUMNS),
+        }
+        results = {name: timeit(case, repeat) for name, case in cases.items()}
+        sizes = {"csv": os.path.getsize(csv_path), "feather": os.path.getsize(feather_path)}
+
+    print(f"\n{len(df):,} rows (csv {sizes['csv'] / 1e6:.1f} MB, feather {sizes['feather'] / 1e6:.1f} MB)")
+    baseline = results["csv"]
+    for name, seconds in results.items():
+        print(f"  {name:<24} {seconds * 1000:9.1f} ms  {baseline / seconds:6.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CSV vs feather load benchmark.")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    base = process_data(RAW_DATA_PATH).reset_index(drop=True)
+    for scale in args.scale:
+        run(scale, args.repeat, base)
+
+
+if __name__ == "__main__":
+    main()
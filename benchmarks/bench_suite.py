@@ -0,0 +1,159 @@
+# Suíte de benchmarks do tratamento, das agregações das páginas e do mapa, sobre
+# dados sintéticos (benchmarks.synthetic) em várias escalas.
+#
+# Uso:
+#     python -m benchmarks.bench_suite [--rows 10000 100000 1000000] [--repeat 5] [--seed 0]
+#                                      [--output bench_suite.json] [--compare anterior.json]
+#
+# Mede process_data, rename_columns, utils.queries.top_cuisines, as agregações
+# dos gráficos das páginas Countries, Cities e Cuisines (com os filtros padrão das
+# páginas) e o mapa da página principal. Cada caso roda --repeat vezes; o JSON
+# gravado em --output tem o ambiente da execução e, por caso e escala, a mediana,
+# o mínimo e todos os tempos. Com --compare, a mediana de cada caso é comparada
+# com a do mesmo caso e escala num resultado anterior.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import utils.cube as cube
+from benchmarks.synthetic import generate
+from utils.data import apply_schema, process_data, rename_columns
+from utils.index import build_index
+from utils.maps import cluster_map, create_figure, density_layer, marker_layer
+from utils.queries import rating_by_cuisine, top_cuisines, top_restaurant_rows
+from utils.ranking import build_ranking
+from utils.tiles import WORLD_BOUNDS, build_tiles, viewport_cells, viewport_rows
+
+# Filtros padrão das páginas.
+COUNTRIES = ["Brazil", "England", "Qatar", "South Africa", "Canada", "Australia"]
+CUISINES = ["Home-made", "BBQ", "Japanese", "Brazilian", "Arabian", "American", "Italian"]
+TOP_N = 10
+
+# Janela do mapa no zoom de uma cidade (centro de São Paulo), onde aparecem os marcadores.
+CITY_BOUNDS = ((-23.60, -46.70), (-23.52, -46.60))
+
+
+def render(layer):
+    m = create_figure()
+    layer.add_to(m)
+    return m.get_root().render()
+
+
+def cases(raw, csv_path, processed, df, map_max_rows):
+    # (nome, função) na ordem de execução; os artefatos derivados são montados antes
+    # de medir as consultas que dependem deles.
+    cells = cube.select_cells(cube.build_cube(df), COUNTRIES)
+    ranking = build_ranking(df)
+    index = build_index(df)
+    tiles = build_tiles(df)
+    all_countries = df["country"].unique().tolist()
+
+    yield "data.process_data", lambda: process_data(csv_path)
+    yield "data.rename_columns", lambda: rename_columns(raw)
+    yield "data.apply_schema", lambda: apply_schema(processed)
+
+    yield "countries.build_cube", lambda: cube.build_cube(df)
+    yield "countries.restaurants_by_country", lambda: cube.restaurants_by_country(cells)
+    yield "countries.cities_by_country", lambda: cube.cities_by_country(cells)
+    yield "countries.mean_votes", lambda: cube.mean_by_country(cells, "votes")
+    yield "countries.mean_cost_for_two", lambda: cube.mean_by_country(cells, "average_cost_for_two")
+
+    yield "cities.restaurants_by_city", lambda: cube.restaurants_by_city(cells)
+    yield "cities.rating_above_4", lambda: cube.restaurants_by_city(cells, "rating_above_4")
+    yield "cities.rating_below_2_5", lambda: cube.restaurants_by_city(cells, "rating_below_2_5")
+    yield "cities.cuisines_by_city", lambda: cube.cuisines_by_city(cells)
+
+    yield "cuisines.build_ranking", lambda: build_ranking(df)
+    yield "cuisines.build_index", lambda: build_index(df)
+    yield "cuisines.top_cuisines", lambda: top_cuisines(df, ranking)
+    yield "cuisines.top_restaurants", lambda: top_restaurant_rows(ranking, index, COUNTRIES, CUISINES, TOP_N)
+    yield "cuisines.best_rated", lambda: rating_by_cuisine(df, TOP_N)
+    yield "cuisines.worst_rated", lambda: rating_by_cuisine(df, TOP_N, ascending=True)
+
+    yield "map.build_tiles", lambda: build_tiles(df)
+    yield "map.world_view", lambda: render(density_layer(viewport_cells(tiles, 1, WORLD_BOUNDS, all_countries)))
+    yield "map.city_view", lambda: render(marker_layer(viewport_rows(df, CITY_BOUNDS)))
+    if len(df) <= map_max_rows:
+        yield "map.cluster_map", lambda: cluster_map(df).get_root().render()
+
+
+def measure(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def environment(args):
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+    }
+
+
+def previous_medians(path):
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)["results"]
+    return {(result["name"], result["rows"]): result["median_seconds"] for result in results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark suite on synthetic Zomato data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--map-max-rows", type=int, default=1_000_000, help="largest scale for the full cluster map")
+    parser.add_argument("--output", default="bench_suite.json", help="JSON file for the results")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    previous = previous_medians(args.compare) if args.compare else {}
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            raw = generate(rows, args.seed)
+            csv_path = os.path.join(tmp, "zomato.csv")
+            raw.to_csv(csv_path, index=False)
+            processed = process_data(csv_path)
+            df = apply_schema(processed).reset_index(drop=True)
+            print(f"{rows:,} raw rows ({len(df):,} after processing)")
+
+            for name, function in cases(raw, csv_path, processed, df, args.map_max_rows):
+                times = measure(function, args.repeat)
+                median = statistics.median(times)
+                results.append({
+                    "name": name,
+                    "rows": rows,
+                    "median_seconds": median,
+                    "min_seconds": min(times),
+                    "seconds": times,
+                })
+                line = f"  {name:<36} {median * 1000:10.2f} ms"
+                if (name, rows) in previous:
+                    line += f"  ({median / previous[name, rows]:5.2f}x previous)"
+                print(line)
+            del raw, processed, df
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(args), "results": results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
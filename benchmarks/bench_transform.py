@@ -0,0 +1,95 @@
+# Compara o tratamento vetorizado (utils.data.transform_data) com a implementação
+# original, linha a linha, e confere que as duas produzem o mesmo dataframe.
+#
+# Uso:
+#     python -m benchmarks.bench_transform [--rows 10000 1000000 10000000] [--repeat 3]
+#
+# O dataset bruto é replicado até o número de linhas pedido, com restaurant_id
+# deslocado a cada cópia para que as linhas não sejam descartadas como duplicatas.
+
+import argparse
+import statistics
+import time
+
+import inflection
+import pandas as pd
+
+from utils.data import (
+    COLUMNS_ORDER,
+    RAW_DATA_PATH,
+    color_name,
+    country_name,
+    create_price_type,
+    transform_data,
+)
+
+
+def legacy_rename_columns(dataframe):
+    df = dataframe.copy()
+    title = lambda x: inflection.titleize(x)
+    snakecase = lambda x: inflection.underscore(x)
+    spaces = lambda x: x.replace(" ", "")
+    cols_old = list(df.columns)
+    cols_old = list(map(title, cols_old))
+    cols_old = list(map(spaces, cols_old))
+    cols_new = list(map(snakecase, cols_old))
+    df.columns = cols_new
+    return df
+
+
+def legacy_transform(df):
+    df = df.dropna()
+    df = legacy_rename_columns(df)
+    df["price_type"] = df.loc[:, "price_range"].apply(lambda x: create_price_type(x))
+    df["country"] = df.loc[:, "country_code"].apply(lambda x: country_name(x))
+    df["color_name"] = df.loc[:, "rating_color"].apply(lambda x: color_name(x))
+    df["cuisines"] = df.loc[:, "cuisines"].apply(lambda x: x.split(",")[0])
+    df = df.drop_duplicates()
+    df = df.copy().loc[:, COLUMNS_ORDER]
+    return df
+
+
+def synthetic_raw(raw, rows):
+    # IDs densos (restaurant_id é int32 no SCHEMA): cada cópia recebe uma faixa própria
+    # e as linhas repetidas do arquivo original continuam repetidas.
+    copies = -(-rows // len(raw))
+    codes, uniques = pd.factorize(raw["Restaurant ID"])
+    parts = []
+    for i in range(copies):
+        part = raw.copy()
+        part["Restaurant ID"] = codes + i * len(uniques) + 1
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True).head(rows)
+
+
+def timeit(func, df, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vectorized vs row-wise transform benchmark.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    raw = pd.read_csv(RAW_DATA_PATH)
+    for rows in args.rows:
+        df = synthetic_raw(raw, rows)
+        legacy_seconds, expected = timeit(legacy_transform, df, args.repeat)
+        seconds, result = timeit(transform_data, df, args.repeat)
+        pd.testing.assert_frame_equal(result, expected)
+        del expected, result
+
+        print(
+            f"{rows:>11,} rows  legacy {legacy_seconds * 1000:10.1f} ms  "
+            f"vectorized {seconds * 1000:10.1f} ms  {legacy_seconds / seconds:5.1f}x  (outputs equal)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Gerador determinístico de dados sintéticos no formato do dataset/zomato.csv,
+# usado pelos benchmarks em escalas de 10 mil a 10 milhões de linhas.
+#
+# Uso:
+#     python -m benchmarks.synthetic --rows 1000000 --output sintetico.csv [--seed 0]
+#
+# Cada restaurante sintético parte de um restaurante do arquivo real sorteado
+# de forma uniforme, o que mantém a distribuição de países e de cidades dentro
+# de cada país. A culinária vem de outro restaurante do mesmo país, e a nota (com
+# cor e texto) e os votos de outro restaurante da mesma cidade, então as
+# combinações variam sem sair das distribuições reais. As coordenadas recebem um
+# pequeno deslocamento, os votos um fator aleatório e cada restaurante um
+# Restaurant ID próprio. Por fim, uma fração das linhas (a mesma do arquivo real,
+# por padrão) é repetida, como as duplicatas do dump original.
+#
+# A mesma seed gera sempre o mesmo arquivo.
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from utils.data import RAW_DATA_PATH
+
+CUISINE_COLUMNS = ["Cuisines"]
+
+RATING_COLUMNS = ["Aggregate rating", "Rating color", "Rating text", "Votes"]
+
+# Desvio padrão do deslocamento das coordenadas, em graus (~500 m).
+COORDINATE_JITTER = 0.005
+
+
+def same_group(groups, positions, rng):
+    # Para cada posição, outra posição sorteada entre as linhas do mesmo grupo.
+    codes, _ = pd.factorize(groups)
+    order = np.argsort(codes, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(np.bincount(codes))))
+    group = codes[positions]
+    size = starts[group + 1] - starts[group]
+    return order[starts[group] + (rng.random(len(positions)) * size).astype(np.int64)]
+
+
+def generate(rows, seed=0, duplicate_fraction=None, source=RAW_DATA_PATH):
+    rng = np.random.default_rng(seed)
+    raw = pd.read_csv(source)
+    base = raw.drop_duplicates().reset_index(drop=True)
+    if duplicate_fraction is None:
+        duplicate_fraction = 1 - len(base) / len(raw)
+
+    unique = rows - int(rows * duplicate_fraction)
+    template = rng.integers(0, len(base), unique)
+    df = base.iloc[template].reset_index(drop=True)
+
+    cuisine_rows = same_group(base["Country Code"], template, rng)
+    df[CUISINE_COLUMNS] = base[CUISINE_COLUMNS].iloc[cuisine_rows].to_numpy()
+    rating_rows = same_group(base["Country Code"].astype(str) + "/" + base["City"], template, rng)
+    df[RATING_COLUMNS] = base[RATING_COLUMNS].iloc[rating_rows].to_numpy()
+
+    df["Restaurant ID"] = rng.permutation(unique) + 1
+    df["Votes"] = np.rint(df["Votes"].to_numpy(dtype=float) * rng.lognormal(0, 0.3, unique)).astype(np.int64)
+    df["Latitude"] = df["Latitude"] + rng.normal(0, COORDINATE_JITTER, unique)
+    df["Longitude"] = df["Longitude"] + rng.normal(0, COORDINATE_JITTER, unique)
+    df = df.astype(raw.dtypes.to_dict())
+
+    duplicates = df.iloc[rng.integers(0, unique, rows - unique)]
+    df = pd.concat([df, duplicates], ignore_index=True)
+    return df.iloc[rng.permutation(rows)].reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic zomato.csv-schema data.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True, help="CSV file to write")
+    args = parser.parse_args(argv)
+
+    df = generate(args.rows, args.seed)
+    df.to_csv(args.output, index=False)
+    print(f"Wrote {len(df):,} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
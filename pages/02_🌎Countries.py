@@ -1,126 +1,12 @@
 # --------------------
 # Libraries
 # --------------------
-import pandas as pd
-import plotly.express as px
+# Só o streamlit e utils.timing no topo; o resto vem perto do uso (ver utils.timing).
 import streamlit as st
 from PIL import Image 
-import inflection
+from utils.timing import finish_rerun, span, start_rerun
 
-# -----------------
-# Import Dataset
-# -----------------
-df = pd.read_csv('dataset/zomato.csv')
-
-# --------------
-# Funções
-# --------------
-
-RAW_DATA_PATH = f"dataset/zomato.csv"
-
-COUNTRIES = {
-    1: "India",
-    14: "Australia",
-    30: "Brazil",
-    37: "Canada",
-    94: "Indonesia",
-    148: "New Zealand",
-    162: "Philippines",
-    166: "Qatar",
-    184: "Singapore",
-    189: "South Africa",
-    191: "Sri Lanka",
-    208: "Turkey",
-    214: "United Arab Emirates",
-    215: "England",
-    216: "United States of America",
-}
-
-COLORS = {
-    "3F7E00": "darkgreen",
-    "5BA829": "green",
-    "9ACD32": "lightgreen",
-    "CDD614": "orange",
-    "FFBA00": "red",
-    "CBCBC8": "darkred",
-    "FF7800": "darkred",
-}
-
-def country_name(country_id):
-  return COUNTRIES[country_id]
-
-def color_name(color_code):
-  return COLORS[color_code]
-
-def create_price_type(price_range):
-  if price_range == 1:
-    return "cheap"
-  elif price_range == 2:
-    return "normal"
-  elif price_range == 3:
-    return "expensive"
-  else:
-    return "gourmet"
-
-def adjust_columns_order(dataframe):
-    df = dataframe.copy()
-
-    new_cols_order = [
-        "restaurant_id",
-        "restaurant_name",
-        "country",
-        "city",
-        "address",
-        "locality",
-        "locality_verbose",
-        "longitude",
-        "latitude",
-        "cuisines",
-        "price_type",
-        "average_cost_for_two",
-        "currency",
-        "has_table_booking",
-        "has_online_delivery",
-        "is_delivering_now",
-        "aggregate_rating",
-        "rating_color",
-        "color_name",
-        "rating_text",
-        "votes",
-    ]
-
-    return df.loc[:, new_cols_order]
-
-def rename_columns(dataframe):
-    df = dataframe.copy()
-    title = lambda x: inflection.titleize(x)
-    snakecase = lambda x: inflection.underscore(x)
-    spaces = lambda x: x.replace(" ", "")
-    cols_old = list(df.columns)
-    cols_old = list(map(title, cols_old))
-    cols_old = list(map(spaces, cols_old))
-    cols_new = list(map(snakecase, cols_old))
-    df.columns = cols_new
-    return df
-
-def process_data(file_path):
-    df = pd.read_csv(file_path)
-    df = df.dropna()
-    df = rename_columns(df)
-    df["price_type"] = df.loc[:, "price_range"].apply(lambda x: create_price_type(x))
-    df["country"] = df.loc[:, "country_code"].apply(lambda x: country_name(x))
-    df["color_name"] = df.loc[:, "rating_color"].apply(lambda x: color_name(x))
-    df["cuisines"] = df.loc[:, "cuisines"].apply(lambda x: x.split(",")[0])
-    df = df.drop_duplicates()
-    df = adjust_columns_order(df)
-    df.to_csv("dataset/processed.csv", index=False)
-    return df
-
-df_raw = pd.read_csv(RAW_DATA_PATH)
-df1 = df_raw.copy()
-df1 = rename_columns(df1)
-df1 = df1.dropna()
-df2 = process_data(RAW_DATA_PATH)
+start_rerun("countries")
 
 st.set_page_config( 
     page_title="Countries", page_icon="🌎", layout="wide"
@@ -135,100 +21,115 @@ col1, col2 = st.sidebar.columns([1, 4], gap="small")
 col1.image(image, width=60)
 col2.markdown("# Fome Zero")
 st.sidebar.markdown('## Filtros')
+
+# =================
+# Layout da Página Countries do Streamlit 
+# =================
+
+st.markdown("# 🌎 Visão Países")
+
+# -----------------
+# Import Dataset
+# -----------------
+from utils.data import dataset_countries, decategorize
+from utils.export import download_button
+import utils.queries as queries
+
+# Os gráficos desta página saem do cubo de agregados; do dataset só é preciso
+# a lista de países, para as opções do filtro.
+with span("dataset_countries"):
+    countries = dataset_countries()
+
 country_options = st.sidebar.multiselect(
     'Escolha os países cujos restaurantes deseja visualizar',
-    df2.loc[:, "country"].unique().tolist(),
+    countries,
         default=["Brazil", "England", "Qatar", "South Africa", "Canada", "Australia"],
     )
 st.sidebar.markdown("""---""")
 
 st.sidebar.markdown("### Dados Tratados")
 
-processed_data = pd.read_csv("dataset/processed.csv")
-
-st.sidebar.download_button(
-    label="Download",
-    data=processed_data.to_csv(index=False, sep=";"),
-    file_name="processed.csv",
-    mime="text/csv",
-    )
-
-# Filtro de países:
-selected_countries = df2['country'].isin(country_options)
-df2 = df2.loc[selected_countries, :]
-
-# =================
-# Layout da Página Countries do Streamlit 
-# =================
+with span("download_button"):
+    download_button(country=country_options)
 
-st.markdown("# 🌎 Visão Países")
+# Gráficos pelo cache de figuras (ver utils.figures).
+import plotly.express as px
+from utils.figures import plotly_chart
 
 with st.container():
-    cols = ['country', 'restaurant_id']
-    df_aux = df2.loc[:, cols].groupby('country').count().sort_values('restaurant_id', ascending=False).reset_index()
-    fig = px.bar(
-       df_aux, 
-       x='country', 
-       y='restaurant_id', text="restaurant_id", 
-       title='Quantidade de restaurantes registrados por país',
-       labels={
-            "country": "Países",
-            "restaurant_id": "Quantidade de Restaurantes",
-        },
-       )
-    st.plotly_chart(fig, use_container_width=True)
+    with span("restaurants_by_country"):
+        df_aux = queries.restaurants_by_country(country_options)
+    with span("plot:restaurants_by_country"):
+        def figure():
+            return px.bar(
+               decategorize(df_aux), 
+               x='country', 
+               y='restaurant_id', text="restaurant_id", 
+               title='Quantidade de restaurantes registrados por país',
+               labels={
+                    "country": "Países",
+                    "restaurant_id": "Quantidade de Restaurantes",
+                },
+               )
+        plotly_chart("countries.restaurants_by_country", (country_options,), figure)
    
 with st.container():   
-   cols = ['country', 'city']
-   df_aux = df2.loc[:, cols].groupby('country').nunique().sort_values('city', ascending=False).reset_index()
-   fig = px.bar(
-      df_aux,
-      x='country',
-      y='city', text='city',
-      title='Quantidade de cidades registradas por país',
-      labels={
-        "country": "Países",
-        "city": "Número de cidades registradas"
-          },
-        )
-   st.plotly_chart(fig, use_container_width=True)
+   with span("cities_by_country"):
+       df_aux = queries.cities_by_country(country_options)
+   with span("plot:cities_by_country"):
+       def figure():
+           return px.bar(
+              decategorize(df_aux),
+              x='country',
+              y='city', text='city',
+              title='Quantidade de cidades registradas por país',
+              labels={
+                "country": "Países",
+                "city": "Número de cidades registradas"
+                  },
+                )
+       plotly_chart("countries.cities_by_country", (country_options,), figure)
   
 with st.container():   
    col1, col2 = st.columns(2)
    with col1:
       
-      df_aux = df2.loc[:, ['votes', 'country']].groupby('country').mean().sort_values('votes', ascending=False).reset_index()
-      fig = px.bar(
-         df_aux,
-         x='country',
-         y='votes', 
-         text='votes',
-         text_auto=".2f",
-         title='Média de avaliações feitas por país',
-         labels={
-            "country": "Países",
-            "votes": 'Quantidade de avaliações'
-         }
-      )
-      st.plotly_chart(fig, use_container_width=True)
+      with span("mean_by_country:votes"):
+          df_aux = queries.mean_by_country(country_options, 'votes')
+      with span("plot:mean_by_country:votes"):
+          def figure():
+              return px.bar(
+                 decategorize(df_aux),
+                 x='country',
+                 y='votes', 
+                 text='votes',
+                 text_auto=".2f",
+                 title='Média de avaliações feitas por país',
+                 labels={
+                    "country": "Países",
+                    "votes": 'Quantidade de avaliações'
+                 }
+              )
+          plotly_chart("countries.mean_by_country:votes", (country_options,), figure)
 
    with col2:
       
-      df_aux = df2.loc[:, ['average_cost_for_two', 'country']].groupby('country').mean().sort_values('average_cost_for_two', ascending=False).reset_index()
-      fig = px.bar(
-         df_aux,
-         x='country',
-         y='average_cost_for_two', text='average_cost_for_two', text_auto='.2f',
-         title='Preço médio de um prato para duas pessoas por país',
-         labels={
-            "country": 'Países',
-            'average_cost_for_two': 'Preço de prato para duas pessoas'
-         }
-      )
-      st.plotly_chart(fig, use_container_width=True)
-
-
-
-  
-      
-          
+      with span("mean_by_country:average_cost_for_two"):
+          df_aux = queries.mean_by_country(country_options, 'average_cost_for_two')
+      with span("plot:mean_by_country:average_cost_for_two"):
+          def figure():
+              return px.bar(
+                 decategorize(df_aux),
+                 x='country',
+                 y='average_cost_for_two', text='average_cost_for_two', text_auto='.2f',
+                 title='Preço médio de um prato para duas pessoas por país',
+                 labels={
+                    "country": 'Países',
+                    'average_cost_for_two': 'Preço de prato para duas pessoas'
+                 }
+              )
+          plotly_chart("countries.mean_by_country:average_cost_for_two", (country_options,), figure)
+
+from utils.debug import debug_panels
+
+debug_panels(finish_rerun(), globals())
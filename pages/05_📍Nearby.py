@@ -0,0 +1,145 @@
+# --------------------
+# Libraries
+# --------------------
+# Só o streamlit e utils.timing no topo; o resto vem perto do uso (ver utils.timing).
+import streamlit as st
+from PIL import Image
+from utils.timing import finish_rerun, span, start_rerun
+
+start_rerun("nearby")
+
+st.set_page_config(
+    page_title="Nearby", page_icon="📍", layout="wide"
+)
+
+# =================
+# Barra Lateral (Sidebar) do Streamlit
+# =================
+image = Image.open('img/1.png')
+
+col1, col2 = st.sidebar.columns([1, 4], gap="small")
+col1.image(image, width=60)
+col2.markdown("# Fome Zero")
+st.sidebar.markdown('## Filtros')
+
+# =================
+# Layout da Página Nearby do Streamlit
+# =================
+
+st.markdown("# 📍 Restaurantes por perto")
+st.markdown('### Clique no mapa para escolher o ponto de busca')
+
+# -----------------
+# Import Dataset
+# -----------------
+from utils.data import decategorize, load_data
+from utils.export import download_button
+from utils.index import load_index, select_rows
+from utils.spatial import load_city_centers, load_spatial, nearest
+
+with span("load_data"):
+    df2 = load_data()
+
+with span("load_city_centers"):
+    centers = load_city_centers()
+city = st.sidebar.selectbox(
+    'Escolha a cidade de referência',
+    centers.index.tolist(),
+    index=centers.index.get_loc("São Paulo") if "São Paulo" in centers.index else 0,
+    )
+
+restaurant_slider = st.sidebar.slider(
+    "Selecione a quantidade de restaurantes que deseja visualizar", 1, 20, 10
+)
+
+rating_slider = st.sidebar.slider(
+    "Nota mínima", 0.0, 5.0, 4.0, step=0.1
+)
+
+radius_slider = st.sidebar.slider(
+    "Distância máxima (km)", 1, 100, 20
+)
+
+country_options = st.sidebar.multiselect(
+    'Escolha os países cujos restaurantes deseja visualizar',
+    df2.loc[:, "country"].unique().tolist(),
+        default=df2.loc[:, "country"].unique().tolist(),
+    )
+
+st.sidebar.markdown("""---""")
+
+# Filtro de países (a nota mínima é aplicada pelo índice espacial, só nos
+# restaurantes perto do ponto):
+with span("select_rows"):
+    selected = select_rows(load_index(), country=country_options)
+
+st.sidebar.markdown("### Dados Tratados")
+
+with span("download_button"):
+    download_button(min_rating=rating_slider, country=country_options)
+
+from utils.maps import base_map, create_figure, draw_map, marker_layer
+
+# Ponto de busca: o último clique no mapa da cidade escolhida (lido por
+# utils.maps.base_map, como no mapa da página principal) ou o centro da cidade. O
+# mapa base de cada cidade fica no cache de figuras (utils.figures).
+with span("map_view"):
+    center = centers.loc[city]
+    city_map, map_view = base_map(
+        "nearby.base_map",
+        (city,),
+        lambda: create_figure(location=[center["latitude"], center["longitude"]], zoom_start=12),
+        "perto",
+        ["last_clicked"],
+    )
+    clicked = (map_view or {}).get("last_clicked") or {}
+    latitude = clicked.get("lat", center["latitude"])
+    longitude = clicked.get("lng", center["longitude"])
+
+# Consulta no índice espacial: só as células da grade ao redor do ponto são lidas.
+with span("nearest"):
+    rows, distances = nearest(
+        load_spatial(),
+        latitude,
+        longitude,
+        restaurant_slider,
+        selected,
+        max_radius_km=radius_slider,
+        min_rating=rating_slider,
+    )
+
+cols = [
+    "restaurant_name",
+    "city",
+    "cuisines",
+    "average_cost_for_two",
+    "currency",
+    "aggregate_rating",
+    "votes",
+    ]
+df_restaurants = df2.iloc[rows][cols].assign(distance_km=distances.round(2))
+
+col1, col2 = st.columns([3, 2])
+with col1:
+    with span("st_folium"):
+        # A camada só depende dos restaurantes encontrados.
+        draw_map(
+            city_map,
+            "nearby.map_layer",
+            (tuple(rows.tolist()),),
+            lambda: marker_layer(df2.iloc[rows]),
+            width=800,
+            height=600,
+        )
+
+with col2:
+    with span("dataframe:nearest"):
+        st.markdown(f'Ponto: {latitude:.5f}, {longitude:.5f}')
+        if df_restaurants.empty:
+            st.markdown(f'Nenhum restaurante com nota {rating_slider:.1f} ou mais a até {radius_slider} km.')
+        else:
+            st.dataframe(decategorize(df_restaurants), hide_index=True)
+
+from utils.debug import debug_panels
+
+debug_panels(finish_rerun(), globals())
@@ -0,0 +1,78 @@
+# O tratamento vetorizado (utils.data.transform_data) precisa produzir o mesmo
+# dataframe que a implementação original, linha a linha, que continua em
+# benchmarks.bench_transform para a comparação de tempo.
+#
+# Uso:
+#     python -m pytest -q tests
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_transform import legacy_transform, synthetic_raw
+from utils.data import RAW_COLUMNS, RAW_DATA_PATH, transform_data
+
+DATASET = os.path.join(os.path.dirname(__file__), os.pardir, RAW_DATA_PATH)
+
+BASE_ROW = {
+    "Restaurant ID": 1,
+    "Restaurant Name": "Mama Lou's Italian Kitchen",
+    "Country Code": 162,
+    "City": "Las Piñas City",
+    "Address": "Block 1, Lot 36, Tropical Avenue",
+    "Locality": "BF International",
+    "Locality Verbose": "BF International, Las Piñas City",
+    "Longitude": 121.0097868741,
+    "Latitude": 14.4476149305,
+    "Cuisines": "Italian",
+    "Average Cost for two": 1100,
+    "Currency": "Botswana Pula(P)",
+    "Has Table booking": 1,
+    "Has Online delivery": 0,
+    "Is delivering now": 0,
+    "Switch to order menu": 0,
+    "Price range": 3,
+    "Aggregate rating": 4.6,
+    "Rating color": "3F7E00",
+    "Rating text": "Excellent",
+    "Votes": 619,
+}
+
+
+def raw_frame(*changes):
+    # Uma linha do CSV bruto por dicionário de mudanças sobre BASE_ROW.
+    return pd.DataFrame([{**BASE_ROW, **change} for change in changes], columns=RAW_COLUMNS)
+
+
+@pytest.fixture
+def raw():
+    return raw_frame(
+        {},
+        {},  # linha repetida
+        {"Restaurant ID": 2, "Country Code": 30, "City": "São Paulo", "Cuisines": "Brazilian, Bar Food",
+         "Price range": 1, "Rating color": "FFBA00", "Aggregate rating": 2.9},
+        {"Restaurant ID": 2, "Country Code": 30, "City": "São Paulo", "Cuisines": "Brazilian, Bar Food",
+         "Price range": 1, "Rating color": "FFBA00", "Aggregate rating": 2.9, "Votes": 7},  # conflito
+        {"Restaurant ID": 3, "Country Code": 1, "Cuisines": "North Indian, Mughlai, Chinese",
+         "Price range": 2, "Rating color": "CBCBC8", "Aggregate rating": 0.0},
+        {"Restaurant ID": 4, "Country Code": 216, "Price range": 4, "Rating color": "5BA829"},
+        {"Restaurant ID": 5, "Country Code": 215, "Cuisines": np.nan},  # removida pelo dropna
+    )
+
+
+def test_transform_matches_legacy(raw):
+    pd.testing.assert_frame_equal(transform_data(raw), legacy_transform(raw))
+
+
+def test_transform_matches_legacy_on_dataset_sample():
+    sample = synthetic_raw(pd.read_csv(DATASET), 2_000)
+    pd.testing.assert_frame_equal(transform_data(sample), legacy_transform(sample))
+
+
+def test_unknown_codes_raise():
+    with pytest.raises(KeyError):
+        transform_data(raw_frame({"Country Code": 999}))
+    with pytest.raises(KeyError):
+        legacy_transform(raw_frame({"Country Code": 999}))
@@ -0,0 +1,209 @@
+# API HTTP local, em JSON, com as métricas do dashboard (utils.queries), para
+# outros serviços usarem sem o Streamlit.
+#
+# Uso:
+#     python -m utils.api [--host 127.0.0.1] [--port 8600]
+#
+# Todas as rotas são GET. Os filtros de países e culinárias são parâmetros
+# repetidos (?country=Brazil&country=Qatar); sem eles, não há filtro. Dataframes
+# voltam como listas de objetos, e limit=N devolve só as N primeiras linhas.
+#
+#   /overview                   totais: restaurantes, países, cidades, avaliações e culinárias
+#   /countries/restaurants      restaurantes por país
+#   /countries/cities           cidades por país
+#   /countries/mean             média por país (column=votes ou average_cost_for_two)
+#   /cities/restaurants         cidades com mais restaurantes (measure=restaurants,
+#                               rating_above_4 ou rating_below_2_5)
+#   /cities/cuisines            cidades com mais tipos de culinária
+#   /cuisines/best              melhor restaurante de cada culinária
+#   /cuisines/top               melhores restaurantes (n=10, filtros country e cuisine)
+#   /cuisines/rating            média da avaliação por culinária (n=10, order=best ou worst)
+#   /cache                      estatísticas dos caches: "data" (dados e índices do
+#                               processo, utils.data) e "results" (utils.results)
+#   /health                     {"status": "ok"}
+#
+# Cada requisição é atendida numa thread, com conexões persistentes (HTTP/1.1).
+# Os resultados e o próprio JSON de cada resposta ficam no cache de resultados
+# (utils.results), compartilhado por todas as threads: consultas repetidas não
+# recalculam nem serializam nada.
+
+import argparse
+import json
+import logging
+import sys
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import utils.queries as queries
+from utils.data import cache_info, decategorize
+from utils.results import cached_result, result_cache_info
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8600
+
+DEFAULT_TOP = 10
+
+
+def values(params, name):
+    # Lista de valores de um parâmetro repetido, sem repetições (como a chave do
+    # cache, utils.results.normalize); None se ele não foi passado.
+    given = params.get(name)
+    return None if given is None else list(dict.fromkeys(given))
+
+
+def value(params, name, default=None):
+    given = params.get(name)
+    if not given:
+        return default
+    if len(given) > 1:
+        raise ValueError(f"parameter {name!r} must be given once")
+    return given[0]
+
+
+def integer(params, name, default=None):
+    given = value(params, name)
+    if given is None:
+        return default
+    try:
+        number = int(given)
+    except ValueError:
+        raise ValueError(f"parameter {name!r} must be an integer, got {given!r}") from None
+    if number < 1:
+        raise ValueError(f"parameter {name!r} must be positive, got {number}")
+    return number
+
+
+def rating_order(params):
+    order = value(params, "order", "best")
+    if order not in ("best", "worst"):
+        raise ValueError(f"parameter 'order' must be best or worst, got {order!r}")
+    return order == "worst"
+
+
+# Rota -> (parâmetros aceitos, consulta). limit vale para todas as rotas.
+ROUTES = {
+    "/overview": (["country"], lambda p: queries.overview(values(p, "country"))),
+    "/countries/restaurants": (["country"], lambda p: queries.restaurants_by_country(values(p, "country"))),
+    "/countries/cities": (["country"], lambda p: queries.cities_by_country(values(p, "country"))),
+    "/countries/mean": (
+        ["country", "column"],
+        lambda p: queries.mean_by_country(values(p, "country"), value(p, "column", "votes")),
+    ),
+    "/cities/restaurants": (
+        ["country", "measure"],
+        lambda p: queries.restaurants_by_city(values(p, "country"), value(p, "measure", "restaurants")),
+    ),
+    "/cities/cuisines": (["country"], lambda p: queries.cuisines_by_city(values(p, "country"))),
+    "/cuisines/best": ([], lambda p: queries.best_restaurants()),
+    "/cuisines/top": (
+        ["country", "cuisine", "n"],
+        lambda p: queries.top_restaurants(values(p, "country"), values(p, "cuisine"), integer(p, "n", DEFAULT_TOP)),
+    ),
+    "/cuisines/rating": (
+        ["n", "order"],
+        lambda p: queries.cuisine_ratings(integer(p, "n", DEFAULT_TOP), rating_order(p)),
+    ),
+}
+
+
+def json_default(item):
+    # Escalares do numpy, como os dos dicionários de best_restaurants.
+    if isinstance(item, np.generic):
+        return item.item()
+    raise TypeError(f"{type(item).__name__} is not JSON serializable")
+
+
+def to_json(result, limit=None):
+    if isinstance(result, pd.DataFrame):
+        result = decategorize(result.head(limit) if limit else result).to_dict(orient="records")
+    return json.dumps(result, ensure_ascii=False, default=json_default).encode("utf-8")
+
+
+def response_body(path, params):
+    # JSON da resposta, no cache de resultados pela rota e pelos parâmetros. Cada
+    # parâmetro é uma lista de valores, normalizada como um multiselect.
+    accepted, query = ROUTES[path]
+    unknown = sorted(set(params) - set(accepted) - {"limit"})
+    if unknown:
+        raise ValueError(f"unknown parameters for {path}: {', '.join(unknown)}")
+    names = tuple(sorted(params))
+    return cached_result(
+        "api:" + path,
+        (names,) + tuple(params[name] for name in names),
+        lambda: to_json(query(params), integer(params, "limit")),
+    )
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Cabeçalhos e corpo saem em duas escritas: com o algoritmo de Nagle, a segunda
+    # esperava o ACK atrasado do cliente e toda resposta levava ~40 ms a mais.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        if url.path == "/health":
+            return self.reply(HTTPStatus.OK, to_json({"status": "ok"}))
+        if url.path == "/cache":
+            return self.reply(HTTPStatus.OK, to_json({"data": cache_info(), "results": result_cache_info()}))
+        if url.path not in ROUTES:
+            return self.reply(HTTPStatus.NOT_FOUND, to_json({"error": f"unknown path {url.path}"}))
+        try:
+            body = response_body(url.path, params)
+        except ValueError as error:
+            return self.reply(HTTPStatus.BAD_REQUEST, to_json({"error": str(error)}))
+        except Exception:
+            logger.exception("Query %s failed", self.path)
+            return self.reply(HTTPStatus.INTERNAL_SERVER_ERROR, to_json({"error": "internal error"}))
+        self.reply(HTTPStatus.OK, body)
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - " + format, self.address_string(), *args)
+
+
+def warm_up():
+    # Monta o cubo, o ranking e os índices antes da primeira requisição.
+    for path in ROUTES:
+        response_body(path, {})
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    warm_up()
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    print(f"Serving the Fome Zero metrics on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local JSON API for the Fome Zero dashboard metrics.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    serve(args.host, args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import pandas as pd
+
+from utils.data import decategorize, load_derived
+
+# Cubo de agregados parciais por (country, city, cuisines, price_type).
+#
+# Cada célula guarda somas e contagens, que podem ser somadas entre células
+# (médias são sempre sum/count na hora da consulta). Contagens distintas de
+# cidades e culinárias saem das próprias chaves do cubo, já que elas fazem
+# parte da chave de cada célula.
+#
+# Os resultados têm as mesmas colunas e a mesma ordem dos groupby que as
+# páginas faziam sobre as linhas do dataset.
+
+CUBE_KEYS = ["country", "city", "cuisines", "price_type"]
+
+CUBE_MEASURES = ["restaurants", "votes", "average_cost_for_two", "rating_above_4", "rating_below_2_5"]
+
+
+def build_cube(df):
+    df = df.loc[:, CUBE_KEYS + ["restaurant_id", "votes", "average_cost_for_two", "aggregate_rating"]]
+    df = df.assign(
+        rating_above_4=df["aggregate_rating"] > 4,
+        rating_below_2_5=df["aggregate_rating"] < 2.5,
+    )
+    cube = df.groupby(CUBE_KEYS, observed=True).agg(
+        restaurants=("restaurant_id", "count"),
+        votes=("votes", "sum"),
+        average_cost_for_two=("average_cost_for_two", "sum"),
+        rating_above_4=("rating_above_4", "sum"),
+        rating_below_2_5=("rating_below_2_5", "sum"),
+    )
+    return cube.astype("int64").reset_index()
+
+
+def update_cube(cube, delta):
+    # Atualização incremental: o cubo das linhas alteradas (ver utils.incremental),
+    # com as versões antigas subtraídas (sign -1) e as novas somadas (sign +1), é
+    # somado ao cubo atual. Células que ficam sem restaurantes são removidas.
+    added = build_cube(delta.loc[delta["sign"] > 0, :])
+    removed = build_cube(delta.loc[delta["sign"] < 0, :])
+    removed[CUBE_MEASURES] = -removed[CUBE_MEASURES]
+
+    # As categorias das chaves mudam com os valores novos: as somas são feitas
+    # sobre textos e as categorias recalculadas, como no build completo.
+    parts = [decategorize(frame) for frame in (cube, added, removed)]
+    merged = pd.concat(parts, ignore_index=True).groupby(CUBE_KEYS)[CUBE_MEASURES].sum()
+    merged = merged.loc[merged["restaurants"] != 0, :].reset_index()
+    return merged.astype({key: "category" for key in CUBE_KEYS}).astype({m: "int64" for m in CUBE_MEASURES})
+
+
+def load_cube():
+    return load_derived("cube", build_cube, update=update_cube)
+
+
+def select_cells(cube, country_options):
+    return cube.loc[cube["country"].isin(country_options), :]
+
+
+# --------------
+# Página Countries
+# --------------
+
+def restaurants_by_country(cells):
+    df_aux = cells.groupby("country", observed=True)["restaurants"].sum().rename("restaurant_id")
+    return df_aux.reset_index().sort_values("restaurant_id", ascending=False).reset_index(drop=True)
+
+
+def cities_by_country(cells):
+    df_aux = cells.groupby("country", observed=True)["city"].nunique()
+    return df_aux.reset_index().sort_values("city", ascending=False).reset_index(drop=True)
+
+
+def mean_by_country(cells, column):
+    # column: "votes" ou "average_cost_for_two"
+    df_aux = cells.groupby("country", observed=True)[[column, "restaurants"]].sum()
+    df_aux = (df_aux[column] / df_aux["restaurants"]).rename(column)
+    return df_aux.reset_index().sort_values(column, ascending=False).reset_index(drop=True)
+
+
+# --------------
+# Página Cities
+# --------------
+
+def restaurants_by_city(cells, measure="restaurants"):
+    # measure: "restaurants" (todos), "rating_above_4" ou "rating_below_2_5"
+    df_aux = cells.groupby(["country", "city"], observed=True)[measure].sum().rename("restaurant_id")
+    # O groupby sobre as linhas só gerava cidades com ao menos um restaurante no filtro.
+    df_aux = df_aux.loc[df_aux > 0]
+    return (
+        df_aux.reset_index()
+        .sort_values(["restaurant_id", "city"], ascending=[False, True])
+        .reset_index(drop=True)
+    )
+
+
+def cuisines_by_city(cells):
+    df_aux = cells.groupby(["country", "city"], observed=True)["cuisines"].nunique()
+    return (
+        df_aux.reset_index()
+        .sort_values(["cuisines", "city"], ascending=[False, True])
+        .reset_index(drop=True)
+    )
@@ -1,58 +1,16 @@
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import streamlit as st
 
+from utils.queries import best_restaurants
+from utils.timing import span
 
-def read_processed_data():
-    return pd.read_csv("./dataset/processed.csv")
-
-
-def top_cuisines():
-    df = read_processed_data()
-
-# Inicialização do dicionário cuisines:
-    cuisines = {
-        "Italian": "",
-        "American": "",
-        "Arabian": "",
-        "Japanese": "",
-        "Brazilian": "",
-    }
-
-# Colunas a serem usadas no st.metric() da página cuisines:
-    cols = [
-        "restaurant_id",
-        "restaurant_name",
-        "country",
-        "city",
-        "cuisines",
-        "average_cost_for_two",
-        "currency",
-        "aggregate_rating",
-        "votes",
-    ]
-
-    for key in cuisines.keys():
-
-        lines = df["cuisines"] == key
-        # Seleciona que os restaurantes que vão aparecer pertencem àquele tipo de culinária
-
-        cuisines[key] = (
-            df.loc[lines, cols]
-            .sort_values(["aggregate_rating", "restaurant_id"], ascending=[False, True])
-            # Seleciona o restaurante pela nota (alta) e pelo ID (baixo)
-            .iloc[0, :]
-            .to_dict() 
-            # As informações do restaurante selecionado são convertidas em um dicionário, que será usado na função write_metrics()
-        )
-
-    return cuisines
+# Métricas da página Cuisines: o melhor restaurante de cada culinária sai de
+# utils.queries.best_restaurants.
 
 
 def write_metrics():
 
-    cuisines = top_cuisines()
+    with span("top_cuisines"):
+        cuisines = best_restaurants()
 
     italian, american, arabian, japonese, brazilian = st.columns(len(cuisines))
 
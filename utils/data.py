@@ -0,0 +1,495 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import inflection
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+from utils.dedup import DEFAULT_CONFLICT_POLICY, deduplicate
+from utils.timing import span
+
+logger = logging.getLogger(__name__)
+
+RAW_DATA_PATH = "dataset/zomato.csv"
+PROCESSED_DIR = "dataset"
+
+# Incrementar sempre que process_data mudar de forma que altere o resultado,
+# para que o build offline (python -m utils.etl) refaça os artefatos.
+TRANSFORM_VERSION = 2
+
+COUNTRIES = {
+    1: "India",
+    14: "Australia",
+    30: "Brazil",
+    37: "Canada",
+    94: "Indonesia",
+    148: "New Zealand",
+    162: "Philippines",
+    166: "Qatar",
+    184: "Singapore",
+    189: "South Africa",
+    191: "Sri Lanka",
+    208: "Turkey",
+    214: "United Arab Emirates",
+    215: "England",
+    216: "United States of America",
+}
+
+COLORS = {
+    "3F7E00": "darkgreen",
+    "5BA829": "green",
+    "9ACD32": "lightgreen",
+    "CDD614": "orange",
+    "FFBA00": "red",
+    "CBCBC8": "darkred",
+    "FF7800": "darkred",
+}
+
+
+PRICE_TYPES = {
+    1: "cheap",
+    2: "normal",
+    3: "expensive",
+}
+
+COLUMNS_ORDER = [
+    "restaurant_id",
+    "restaurant_name",
+    "country",
+    "city",
+    "address",
+    "locality",
+    "locality_verbose",
+    "longitude",
+    "latitude",
+    "cuisines",
+    "price_type",
+    "average_cost_for_two",
+    "currency",
+    "has_table_booking",
+    "has_online_delivery",
+    "is_delivering_now",
+    "aggregate_rating",
+    "rating_color",
+    "color_name",
+    "rating_text",
+    "votes",
+]
+
+# Tipos do dataset tratado em memória. Textos repetidos viram category, inteiros
+# são reduzidos para 32 bits e as flags 0/1 viram bool. latitude, longitude e
+# aggregate_rating continuam float64: em float32 as coordenadas perdem ~1 m de
+# precisão e as médias de avaliação mudam nas últimas casas, o que altera a
+# ordem dos rankings.
+SCHEMA = {
+    "restaurant_id": "int32",
+    "country": "category",
+    "city": "category",
+    "cuisines": "category",
+    "price_type": "category",
+    "average_cost_for_two": "int32",
+    "currency": "category",
+    "has_table_booking": "bool",
+    "has_online_delivery": "bool",
+    "is_delivering_now": "bool",
+    "rating_color": "category",
+    "color_name": "category",
+    "rating_text": "category",
+    "votes": "int32",
+}
+
+FLAG_COLUMNS = ["has_table_booking", "has_online_delivery", "is_delivering_now"]
+
+# Colunas do zomato.csv, na ordem do arquivo.
+RAW_COLUMNS = [
+    "Restaurant ID",
+    "Restaurant Name",
+    "Country Code",
+    "City",
+    "Address",
+    "Locality",
+    "Locality Verbose",
+    "Longitude",
+    "Latitude",
+    "Cuisines",
+    "Average Cost for two",
+    "Currency",
+    "Has Table booking",
+    "Has Online delivery",
+    "Is delivering now",
+    "Switch to order menu",
+    "Price range",
+    "Aggregate rating",
+    "Rating color",
+    "Rating text",
+    "Votes",
+]
+
+
+def country_name(country_id):
+    return COUNTRIES[country_id]
+
+
+def color_name(color_code):
+    return COLORS[color_code]
+
+
+def create_price_type(price_range):
+    if price_range == 1:
+        return "cheap"
+    elif price_range == 2:
+        return "normal"
+    elif price_range == 3:
+        return "expensive"
+    else:
+        return "gourmet"
+
+
+@functools.lru_cache(maxsize=None)
+def column_name(column):
+    # "Average Cost for two" -> "AverageCostForTwo" -> "average_cost_for_two"
+    return inflection.underscore(inflection.titleize(column).replace(" ", ""))
+
+
+# Tabela de renomeação calculada uma única vez, na importação do módulo.
+COLUMN_NAMES = {column: column_name(column) for column in RAW_COLUMNS}
+
+
+def adjust_columns_order(dataframe):
+    return dataframe.loc[:, COLUMNS_ORDER]
+
+
+def rename_columns(dataframe):
+    df = dataframe.copy()
+    df.columns = [COLUMN_NAMES.get(column) or column_name(column) for column in df.columns]
+    return df
+
+
+def lookup(series, mapping):
+    # Equivalente vetorizado de series.apply(lambda x: mapping[x]): códigos desconhecidos
+    # continuam gerando KeyError em vez de virarem NaN silenciosamente.
+    result = series.map(mapping)
+    missing = result.isna() & series.notna()
+    if missing.any():
+        raise KeyError(sorted(series[missing].unique().tolist()))
+    return result
+
+
+def first_cuisine(series):
+    # Há poucos valores distintos de cuisines: o split é feito uma vez por valor
+    # distinto e o resultado é espalhado pelas linhas via códigos do factorize.
+    codes, uniques = pd.factorize(series)
+    first = np.array([value.split(",")[0] for value in uniques], dtype=object)
+    return pd.Series(first[codes], index=series.index, name=series.name)
+
+
+def transform_data(df, conflict_policy=DEFAULT_CONFLICT_POLICY):
+    names = [COLUMN_NAMES.get(column) or column_name(column) for column in df.columns]
+    # set_axis devolve um novo dataframe (sem cópia dos dados) que não é marcado como
+    # fatia do resultado do dropna, então as atribuições abaixo não passam pelo
+    # SettingWithCopy de pandas.
+    df = df.dropna().set_axis(names, axis=1, copy=False)
+    df["price_type"] = df["price_range"].map(PRICE_TYPES).fillna("gourmet")
+    df["country"] = lookup(df["country_code"], COUNTRIES)
+    df["color_name"] = lookup(df["rating_color"], COLORS)
+    df["cuisines"] = first_cuisine(df["cuisines"])
+    # Linhas repetidas saem pelo par (restaurant_id, fingerprint da linha); as
+    # estatísticas ficam em df.attrs["dedup"] (ver utils.dedup).
+    df, stats = deduplicate(df, policy=conflict_policy)
+    logger.info("Dropped %(exact_duplicates)d duplicate and %(conflict_rows_dropped)d conflicting rows", stats)
+    df = adjust_columns_order(df)
+    df.attrs["dedup"] = {"policy": conflict_policy, **stats}
+    return df
+
+
+def process_data(file_path, conflict_policy=DEFAULT_CONFLICT_POLICY):
+    return transform_data(pd.read_csv(file_path), conflict_policy)
+
+
+def apply_schema(df):
+    dtypes = {column: dtype for column, dtype in SCHEMA.items() if column in df.columns}
+    return df.astype(dtypes)
+
+
+def memory_report(before, after):
+    # Bytes por coluna (deep=True conta também as strings) antes e depois do schema.
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "bytes_before": before.memory_usage(index=False, deep=True),
+        "dtype_after": after.dtypes.astype(str),
+        "bytes_after": after.memory_usage(index=False, deep=True),
+    })
+    report.loc["total"] = ["", report["bytes_before"].sum(), "", report["bytes_after"].sum()]
+    report["ratio"] = report["bytes_before"] / report["bytes_after"]
+    return report
+
+
+def decategorize(df):
+    # Para os gráficos: plotly express agrupa colunas category por todas as categorias,
+    # inclusive as que não aparecem no dataframe filtrado, e falha nelas.
+    columns = df.select_dtypes("category").columns
+    return df.astype({column: str for column in columns})
+
+
+# --------------
+# Cache do dataset tratado
+# --------------
+# O cache vive no módulo, então é compartilhado por todas as sessões e páginas
+# do mesmo processo do servidor Streamlit. O dataframe devolvido é compartilhado:
+# as páginas devem filtrá-lo (df.loc[...]) e nunca alterá-lo in place.
+
+_cache = {}
+# _cache_lock protege só o dicionário e as estatísticas, por pouco tempo. Cada
+# chave tem o seu lock de build: uma construção demorada (o dataset, as partições,
+# o ranking) bloqueia só quem pede a mesma chave, e os acertos das outras chaves
+# não esperam por ela.
+_cache_lock = threading.Lock()
+_build_locks = {}
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def file_digest(file_path):
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def artifact_paths(output_dir=PROCESSED_DIR):
+    return {
+        "feather": os.path.join(output_dir, "processed.feather"),
+        "csv": os.path.join(output_dir, "processed.csv"),
+        "countries": os.path.join(output_dir, "processed_by_country.arrow"),
+        "delta": os.path.join(output_dir, "processed_delta.feather"),
+        "hashes": os.path.join(output_dir, "processed_hashes.feather"),
+        "manifest": os.path.join(output_dir, "processed.json"),
+    }
+
+
+def read_manifest(output_dir=PROCESSED_DIR):
+    try:
+        with open(artifact_paths(output_dir)["manifest"], encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def current_artifact(digest, output_dir=PROCESSED_DIR):
+    # Devolve (formato, caminho) do melhor artefato válido para a fonte com esse hash.
+    manifest = read_manifest(output_dir)
+    if (
+        manifest is None
+        or manifest.get("transform_version") != TRANSFORM_VERSION
+        or manifest.get("source", {}).get("sha256") != digest
+    ):
+        return None, None
+
+    paths = artifact_paths(output_dir)
+    for fmt in ("feather", "csv"):
+        if fmt in manifest.get("outputs", {}) and os.path.exists(paths[fmt]):
+            return fmt, paths[fmt]
+    return None, None
+
+
+def current_partitions(digest, output_dir=PROCESSED_DIR):
+    # Caminho do artefato particionado por país, se ele for válido para a fonte com esse hash.
+    manifest = read_manifest(output_dir)
+    path = artifact_paths(output_dir)["countries"]
+    if (
+        manifest is None
+        or manifest.get("transform_version") != TRANSFORM_VERSION
+        or manifest.get("source", {}).get("sha256") != digest
+        or "countries" not in manifest.get("outputs", {})
+        or not os.path.exists(path)
+    ):
+        return None
+    return path
+
+
+def read_feather(path, columns=None):
+    # Arrow IPC sem compressão: com memory_map o arquivo é mapeado em vez de copiado,
+    # e apenas as colunas pedidas são materializadas.
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def read_processed(digest, file_path, columns=None):
+    # O dashboard apenas lê o artefato gerado pelo build offline; se ele estiver
+    # ausente ou desatualizado, o dataset é tratado em memória, sem gravar nada.
+    fmt, path = current_artifact(digest)
+    if fmt == "feather":
+        # O feather já é gravado com o SCHEMA aplicado.
+        return read_feather(path, columns)
+    if fmt == "csv":
+        df = pd.read_csv(path, usecols=columns)
+    else:
+        logger.warning("Processed artifacts are missing or stale, processing %s in memory", file_path)
+        df = process_data(file_path).reset_index(drop=True)
+    df = df if columns is None else df.loc[:, columns]
+    return apply_schema(df)
+
+
+# Artefato particionado por país: um arquivo Arrow IPC com um record batch por
+# país, na ordem em que os países aparecem no dataset, e o índice de cada batch
+# guardado nos metadados do schema (ver utils.etl.write_country_partitions). Com
+# memory_map, ler os batches de Brazil e Qatar só toca os bytes desses dois
+# países.
+PARTITION_METADATA = b"fome_zero.countries"
+
+
+def read_partition_index(path):
+    # {país: índice do record batch}, na ordem dos países no dataset.
+    with pa.memory_map(path) as source:
+        metadata = pa.ipc.open_file(source).schema.metadata
+    return json.loads(metadata[PARTITION_METADATA])
+
+
+def read_partitions(path, countries, columns=None):
+    # As linhas voltam com o índice original do dataset e na ordem original, como
+    # em load_data().loc[df["country"].isin(countries)].
+    batch_of = read_partition_index(path)
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        # Um país repetido na seleção (como no isin) é lido uma vez só.
+        batches = [reader.get_batch(batch_of[country]) for country in dict.fromkeys(countries) if country in batch_of]
+        if not batches and reader.num_record_batches:
+            # Seleção vazia: um batch sem linhas mantém os dicionários das categorias.
+            batches = [reader.get_batch(0).slice(0, 0)]
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+        if columns is not None:
+            # A coluna do índice (gravada com preserve_index=True) também é lida.
+            table = table.select(list(columns) + table.schema.pandas_metadata["index_columns"])
+        return table.to_pandas().sort_index()
+
+
+def read_delta(from_digest, to_digest, output_dir=PROCESSED_DIR):
+    # Linhas alteradas pela atualização incremental (utils.incremental) da fonte com
+    # hash from_digest para a fonte com hash to_digest: versões antigas com sign -1
+    # e novas com sign +1. None se o último build não foi essa atualização.
+    manifest = read_manifest(output_dir)
+    if (
+        manifest is None
+        or manifest.get("transform_version") != TRANSFORM_VERSION
+        or manifest.get("source", {}).get("sha256") != to_digest
+        or (manifest.get("delta") or {}).get("from_sha256") != from_digest
+    ):
+        return None
+    return read_feather(artifact_paths(output_dir)["delta"])
+
+
+def cached(key, file_path, build, update=None):
+    # Devolve o valor em cache para (key, fingerprint do arquivo), chamando
+    # build(digest) apenas quando o conteúdo do arquivo muda. Com update, se o
+    # arquivo mudou por uma atualização incremental a partir da versão em cache, o
+    # valor novo é update(valor antigo, delta) em vez de um build completo.
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    key = (path, key)
+    fresh = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        # mtime e tamanho iguais: não é preciso reler o arquivo para calcular o hash.
+        if entry is not None and entry["stat"] == fresh:
+            _cache_stats["hits"] += 1
+            return entry["data"]
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+
+    with build_lock:
+        # Outra thread pode ter construído o valor enquanto esta esperava o lock.
+        with _cache_lock:
+            entry = _cache.get(key)
+            if entry is not None and entry["stat"] == fresh:
+                _cache_stats["hits"] += 1
+                return entry["data"]
+
+        digest = file_digest(path)
+
+        # Arquivo "tocado" mas com o mesmo conteúdo: mantém o valor em cache.
+        if entry is not None and entry["digest"] == digest:
+            with _cache_lock:
+                entry["stat"] = fresh
+                _cache_stats["hits"] += 1
+            return entry["data"]
+
+        with _cache_lock:
+            _cache_stats["misses"] += 1
+        logger.info("Cache miss for %s %s (sha256 %s)", path, key[1], digest[:12])
+        delta = None
+        if entry is not None and update is not None:
+            delta = read_delta(entry["digest"], digest)
+        # Span do rerun em andamento (ver utils.timing): leituras e reconstruções
+        # aparecem no painel de tempos só nos reruns que as fazem.
+        with span("cache_miss:" + ":".join(str(part) for part in key[1] if part is not None)):
+            data = build(digest) if delta is None else update(entry["data"], delta)
+        with _cache_lock:
+            _cache[key] = {"stat": fresh, "digest": digest, "data": data}
+        return data
+
+
+def load_data(file_path=RAW_DATA_PATH, columns=None):
+    # columns: projeção opcional; cada combinação de colunas tem sua própria entrada no cache.
+    columns = list(columns) if columns is not None else None
+    key = ("data", tuple(columns) if columns is not None else None)
+    return cached(key, file_path, lambda digest: read_processed(digest, file_path, columns))
+
+
+def partitions_path(file_path=RAW_DATA_PATH):
+    return cached(("partitions",), file_path, current_partitions)
+
+
+def dataset_countries(file_path=RAW_DATA_PATH):
+    # Países do dataset na ordem em que aparecem (como df["country"].unique()),
+    # sem carregar as linhas quando o artefato particionado existe.
+    path = partitions_path(file_path)
+    if path is None:
+        return load_data(file_path, columns=["country"])["country"].unique().tolist()
+    return list(read_partition_index(path))
+
+
+def load_countries(countries, file_path=RAW_DATA_PATH, columns=None):
+    # Linhas dos países escolhidos, lidas apenas das partições desses países.
+    # Sem o artefato particionado, filtra o dataset completo.
+    path = partitions_path(file_path)
+    if path is None:
+        selected = load_data(file_path, columns=["country"])["country"].isin(countries)
+        return load_data(file_path, columns).loc[selected, :]
+    return read_partitions(path, countries, columns)
+
+
+def load_derived(name, build, file_path=RAW_DATA_PATH, update=None):
+    # Estruturas derivadas do dataset (cubo, índices...) são construídas uma vez por
+    # versão do arquivo, a partir do dataframe completo, e compartilhadas como ele.
+    # update(valor, delta), opcional, aplica só as linhas alteradas (ver cached).
+    return cached(("derived", name), file_path, lambda digest: build(load_data(file_path)), update)
+
+
+def dataset_version(file_path=RAW_DATA_PATH):
+    # sha256 do arquivo de origem, conferido como as outras entradas do cache: o
+    # arquivo só é relido quando o mtime ou o tamanho mudam.
+    return cached(("version",), file_path, lambda digest: digest)
+
+
+def cache_info():
+    with _cache_lock:
+        hits, misses = _cache_stats["hits"], _cache_stats["misses"]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": len(_cache),
+        }
+
+
+def cache_items():
+    # (chave, valor) de cada entrada do cache, para a contagem de memória (utils.memory).
+    with _cache_lock:
+        return [(key[1], entry["data"]) for key, entry in _cache.items()]
+
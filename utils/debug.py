@@ -0,0 +1,99 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from utils.memory import (
+    MEMORY_LOG_ENV,
+    cache_sizes,
+    frame_sizes,
+    rss_bytes,
+    rss_history,
+    start_monitor,
+    start_tracing,
+)
+from utils.data import cache_info
+from utils.figures import figure_cache_info
+from utils.results import result_cache_info
+
+# Painéis de depuração da barra lateral. Ficam escondidos, a não ser que o
+# servidor seja iniciado com FOME_ZERO_DEBUG=1; mesmo assim cada painel só
+# aparece quando marcado na barra lateral. As páginas chamam debug_panels no
+# fim de cada rerun.
+
+DEBUG_ENV = "FOME_ZERO_DEBUG"
+
+
+def debug_enabled():
+    return os.environ.get(DEBUG_ENV) == "1"
+
+
+def timing_panel(rerun):
+    # rerun: o resultado de utils.timing.finish_rerun.
+    if rerun is None or not debug_enabled():
+        return
+    if not st.sidebar.checkbox("Mostrar tempos do rerun", key="debug_timing"):
+        return
+    spans = pd.DataFrame(rerun["spans"], columns=["name", "depth", "start_ms", "duration_ms"])
+    spans["etapa"] = ["· " * depth + name for name, depth in zip(spans["name"], spans["depth"])]
+    st.sidebar.markdown(f"### Tempos do rerun ({rerun['total_ms']:.0f} ms)")
+    st.sidebar.dataframe(
+        spans[["etapa", "start_ms", "duration_ms"]].round(1),
+        hide_index=True,
+        column_config={"start_ms": "início (ms)", "duration_ms": "duração (ms)"},
+    )
+
+
+def megabytes(frame):
+    return frame.assign(MB=(frame["bytes"] / 2**20).round(2)).drop(columns="bytes")
+
+
+def memory_panel(rerun, namespace):
+    # namespace: as variáveis da página (globals()), de onde saem os dataframes medidos.
+    if not debug_enabled():
+        return
+    if not st.sidebar.checkbox("Mostrar memória", key="debug_memory"):
+        return
+    frames = frame_sizes(namespace)
+    own = frames.loc[~frames["shared"], "bytes"].sum()
+    cache = cache_sizes()
+    st.sidebar.markdown(f"### Memória (RSS {rss_bytes() / 2**20:.0f} MB)")
+    st.sidebar.markdown(f"Dataframes da página: {own / 2**20:.1f} MB próprios da sessão")
+    st.sidebar.dataframe(megabytes(frames), hide_index=True)
+    data = cache_info()
+    st.sidebar.markdown(
+        f"Cache do processo: {cache['bytes'].sum() / 2**20:.1f} MB em {data['entries']} entradas,"
+        f" {data['hit_rate']:.0%} de acertos ({data['hits']} de {data['hits'] + data['misses']})"
+    )
+    st.sidebar.dataframe(megabytes(cache), hide_index=True)
+    results = result_cache_info()
+    st.sidebar.markdown(
+        f"Cache de resultados: {results['bytes'] / 2**20:.1f} MB em {results['entries']} entradas,"
+        f" {results['hit_rate']:.0%} de acertos ({results['hits']} de {results['hits'] + results['misses']})"
+    )
+    figures = figure_cache_info()
+    st.sidebar.markdown(
+        f"Cache de figuras: {figures['bytes'] / 2**20:.1f} MB em {figures['entries']} entradas,"
+        f" {figures['hit_rate']:.0%} de acertos ({figures['hits']} de {figures['hits'] + figures['misses']})"
+    )
+
+    history = rss_history()
+    if len(history) > 1:
+        st.sidebar.line_chart(
+            pd.DataFrame({"RSS (MB)": history["rss_bytes"].to_numpy() / 2**20},
+                         index=pd.to_datetime(history["time"], unit="s"))
+        )
+    if rerun and rerun["allocations"]:
+        st.sidebar.markdown("Maiores alocações do rerun (tracemalloc)")
+        allocations = pd.DataFrame(rerun["allocations"])
+        allocations["KB"] = (allocations["size_diff_bytes"] / 1024).round(1)
+        st.sidebar.dataframe(allocations[["location", "KB", "count_diff"]], hide_index=True)
+
+
+def debug_panels(rerun, namespace):
+    # rerun: o resultado de utils.timing.finish_rerun; namespace: globals() da página.
+    if debug_enabled() or os.environ.get(MEMORY_LOG_ENV):
+        start_tracing()
+        start_monitor()
+    timing_panel(rerun)
+    memory_panel(rerun, namespace)
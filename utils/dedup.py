@@ -0,0 +1,55 @@
+import pandas as pd
+
+# Deduplicação por chave e fingerprint.
+#
+# Cada linha é reduzida uma única vez a um fingerprint de 64 bits (hash de todas
+# as colunas); linhas repetidas são as que têm a mesma chave (restaurant_id) e o
+# mesmo fingerprint, então a comparação é feita sobre dois inteiros em vez das
+# ~21 colunas, com os textos longos de endereço. Linhas com a mesma chave e
+# conteúdo diferente são conflitos, resolvidos pela política escolhida:
+#
+#   keep_all  mantém todas as versões (o comportamento de drop_duplicates)
+#   first     mantém a primeira linha de cada chave
+#   last      mantém a última linha de cada chave
+#   error     levanta ValueError com as chaves em conflito
+
+CONFLICT_POLICIES = ["keep_all", "first", "last", "error"]
+
+DEFAULT_CONFLICT_POLICY = "keep_all"
+
+
+def fingerprints(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def deduplicate(df, key="restaurant_id", policy=DEFAULT_CONFLICT_POLICY):
+    # Devolve (linhas mantidas, estatísticas). Entre linhas repetidas fica a
+    # primeira, como no drop_duplicates.
+    if policy not in CONFLICT_POLICIES:
+        raise ValueError(f"unknown conflict policy {policy!r}, expected one of {CONFLICT_POLICIES}")
+
+    keys = pd.Series(df[key].to_numpy())
+    # O par (chave, fingerprint): uma colisão de hash entre restaurantes diferentes
+    # não descarta nenhum deles.
+    repeated = pd.DataFrame({"key": keys, "fingerprint": fingerprints(df)}).duplicated().to_numpy()
+
+    # Chaves com mais de uma versão entre as linhas que sobraram.
+    versions = keys[~repeated]
+    conflicting = versions.duplicated(keep=False).to_numpy()
+    conflicting_keys = versions[conflicting].unique()
+
+    keep = ~repeated
+    if policy == "error" and len(conflicting_keys):
+        raise ValueError(f"{len(conflicting_keys)} {key} values with conflicting rows: {conflicting_keys[:10].tolist()}")
+    if policy in ("first", "last"):
+        # A linha mais antiga/recente de cada chave, seja qual for a versão.
+        keep = ~keys.duplicated(keep=policy).to_numpy()
+
+    stats = {
+        "rows": len(df),
+        "exact_duplicates": int(repeated.sum()),
+        "conflicting_keys": len(conflicting_keys),
+        "conflict_rows_dropped": int((~repeated).sum() - keep.sum()),
+        "kept": int(keep.sum()),
+    }
+    return df.loc[keep, :], stats
@@ -0,0 +1,202 @@
+# Build offline do dataset tratado.
+#
+# Uso:
+#     python -m utils.etl [--source dataset/zomato.csv] [--output-dir dataset] [--force]
+#                         [--conflict-policy keep_all]
+#
+# Gera os artefatos de forma atômica (arquivo temporário + rename): processed.csv,
+# processed.feather (Arrow IPC colunar, sem compressão, para leitura via memory map),
+# processed_by_country.arrow (o mesmo conteúdo com um record batch por país) e um
+# manifesto (processed.json) com o hash da fonte e a versão do tratamento.
+# Se nada mudou desde o último build, o trabalho é pulado.
+#
+# --conflict-policy decide o que fazer com linhas de mesmo restaurant_id e
+# conteúdo diferente (ver utils.dedup); a política e as contagens de linhas
+# descartadas ficam na seção "dedup" do manifesto.
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pyarrow as pa
+from pyarrow import feather
+
+from utils.data import (
+    PARTITION_METADATA,
+    PROCESSED_DIR,
+    RAW_DATA_PATH,
+    TRANSFORM_VERSION,
+    apply_schema,
+    artifact_paths,
+    file_digest,
+    process_data,
+    read_manifest,
+)
+from utils.dedup import CONFLICT_POLICIES, DEFAULT_CONFLICT_POLICY
+
+
+def write_country_partitions(df, path):
+    # Um record batch por país, na ordem em que os países aparecem no dataset. As
+    # categorias são as do dataset completo, então todos os batches compartilham os
+    # mesmos dicionários; o índice original vai junto (preserve_index) para que a
+    # leitura de vários países devolva as linhas na ordem original.
+    df = apply_schema(df)
+    countries = df["country"].unique().tolist()
+    schema = pa.Schema.from_pandas(df, preserve_index=True)
+    schema = schema.with_metadata({
+        **schema.metadata,
+        PARTITION_METADATA: json.dumps({country: number for number, country in enumerate(countries)}),
+    })
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        for country in countries:
+            partition = df.loc[df["country"] == country, :]
+            writer.write_batch(pa.RecordBatch.from_pandas(partition, schema=schema, preserve_index=True))
+
+
+# Formatos gerados pelo build e a função que grava cada um.
+WRITERS = {
+    "csv": lambda df, path: df.to_csv(path, index=False),
+    # O feather guarda o SCHEMA compacto (categorias como dictionary arrays do Arrow).
+    "feather": lambda df, path: feather.write_feather(apply_schema(df), path, compression="uncompressed"),
+    "countries": write_country_partitions,
+}
+
+
+def atomic_write(path, write):
+    # O arquivo temporário fica no mesmo diretório para que os.replace seja atômico;
+    # leitores nunca enxergam um arquivo pela metade.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    os.close(fd)
+    try:
+        write(tmp_path)
+        # mkstemp cria o arquivo com permissão 0600; o artefato precisa ser legível pelo servidor.
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def is_up_to_date(source_digest, output_dir, formats=WRITERS, conflict_policy=DEFAULT_CONFLICT_POLICY):
+    manifest = read_manifest(output_dir)
+    if manifest is None:
+        return False
+    if (
+        manifest.get("transform_version") != TRANSFORM_VERSION
+        or manifest.get("source", {}).get("sha256") != source_digest
+        or manifest.get("dedup", {}).get("policy", DEFAULT_CONFLICT_POLICY) != conflict_policy
+    ):
+        return False
+
+    paths = artifact_paths(output_dir)
+    outputs = manifest.get("outputs", {})
+    for fmt in formats:
+        if fmt not in outputs or not os.path.exists(paths[fmt]):
+            return False
+        if outputs[fmt].get("sha256") != file_digest(paths[fmt]):
+            return False
+    return True
+
+
+def write_json(path, payload):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+
+def write_outputs(df, output_dir, formats=WRITERS):
+    # Grava os artefatos dos formatos pedidos e devolve a seção "outputs" do manifesto.
+    paths = artifact_paths(output_dir)
+    outputs = {}
+    for fmt in formats:
+        writer = WRITERS[fmt]
+        atomic_write(paths[fmt], lambda path: writer(df, path))
+        outputs[fmt] = {
+            "path": paths[fmt],
+            "rows": len(df),
+            "bytes": os.path.getsize(paths[fmt]),
+            "sha256": file_digest(paths[fmt]),
+        }
+    return outputs
+
+
+def write_manifest(source, source_digest, outputs, output_dir, source_size=None, **extra):
+    # source_size: tamanho da fonte quando ela ainda vai ser substituída pelo
+    # arquivo descrito (ver utils.incremental).
+    manifest = {
+        "transform_version": TRANSFORM_VERSION,
+        "source": {
+            "path": source,
+            "size": os.path.getsize(source) if source_size is None else source_size,
+            "sha256": source_digest,
+        },
+        "outputs": outputs,
+        **extra,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    # O manifesto é gravado por último: enquanto ele não existir, o dashboard não usa os artefatos.
+    atomic_write(artifact_paths(output_dir)["manifest"], lambda path: write_json(path, manifest))
+    return manifest
+
+
+def build(
+    source=RAW_DATA_PATH,
+    output_dir=PROCESSED_DIR,
+    force=False,
+    conflict_policy=DEFAULT_CONFLICT_POLICY,
+    recorded_source=None,
+):
+    # recorded_source: caminho gravado no manifesto, quando source é uma cópia que
+    # ainda vai substituí-lo (ver utils.incremental).
+    source_digest = file_digest(source)
+
+    if not force and is_up_to_date(source_digest, output_dir, conflict_policy=conflict_policy):
+        print(f"{output_dir} is up to date (transform v{TRANSFORM_VERSION}), skipping")
+        return False
+
+    start = time.perf_counter()
+    df = process_data(source, conflict_policy)
+    dedup = df.attrs["dedup"]
+    df = df.reset_index(drop=True)
+    outputs = write_outputs(df, output_dir)
+    write_manifest(
+        recorded_source or source,
+        source_digest,
+        outputs,
+        output_dir,
+        source_size=os.path.getsize(source),
+        dedup=dedup,
+    )
+
+    elapsed = time.perf_counter() - start
+    print(f"Built {', '.join(outputs)} in {output_dir} ({len(df)} rows) in {elapsed:.2f}s")
+    print(
+        f"Dropped {dedup['exact_duplicates']} duplicate rows and {dedup['conflict_rows_dropped']} rows "
+        f"of {dedup['conflicting_keys']} conflicting restaurant_id values (policy {conflict_policy})"
+    )
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the processed Fome Zero dataset.")
+    parser.add_argument("--source", default=RAW_DATA_PATH, help="raw Zomato CSV")
+    parser.add_argument("--output-dir", default=PROCESSED_DIR, help="directory for the processed artifacts")
+    parser.add_argument("--force", action="store_true", help="rebuild even if up to date")
+    parser.add_argument(
+        "--conflict-policy",
+        choices=CONFLICT_POLICIES,
+        default=DEFAULT_CONFLICT_POLICY,
+        help="what to do with rows sharing a restaurant_id but differing in content",
+    )
+    args = parser.parse_args(argv)
+
+    build(args.source, args.output_dir, args.force, args.conflict_policy)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
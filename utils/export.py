@@ -0,0 +1,119 @@
+import gzip
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from utils.data import FLAG_COLUMNS, load_data, load_derived
+from utils.index import load_index, select_rows
+from utils.results import cached_result
+
+try:
+    import zstandard
+except ImportError:  # dependência opcional: sem ela o formato CSV (zstd) não é oferecido
+    zstandard = None
+
+# Arquivo do botão Download da barra lateral.
+#
+# O dataset completo é serializado uma única vez por versão do arquivo e por
+# formato (via load_derived), e só quando algum usuário escolhe esse formato;
+# as execuções seguintes das páginas reaproveitam os bytes. "Seleção atual"
+# serializa apenas as linhas dos filtros da página, uma vez por combinação de
+# filtros e formato (no cache de resultados, utils.results).
+#
+# O arquivo pronto fica inteiro em memória: o st.download_button recebe os bytes
+# de uma vez. O CSV é escrito em blocos de EXPORT_CHUNK_ROWS linhas direto no
+# compressor só para não montar também o texto CSV completo antes de compactá-lo.
+
+EXPORT_CHUNK_ROWS = 50_000
+
+
+def csv_chunks(df):
+    # Mesmo formato do processed.csv (flags como 0/1), bloco a bloco.
+    flags = {column: "int64" for column in FLAG_COLUMNS if column in df.columns}
+    for start in range(0, max(len(df), 1), EXPORT_CHUNK_ROWS):
+        chunk = df.iloc[start:start + EXPORT_CHUNK_ROWS].astype(flags)
+        yield chunk.to_csv(index=False, sep=";", header=start == 0).encode("utf-8")
+
+
+def write_csv(df, f):
+    for chunk in csv_chunks(df):
+        f.write(chunk)
+
+
+def write_csv_gzip(df, f):
+    with gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as gz:
+        write_csv(df, gz)
+
+
+def write_csv_zstd(df, f):
+    with zstandard.ZstdCompressor().stream_writer(f, closefd=False) as zst:
+        write_csv(df, zst)
+
+
+def write_parquet(df, f):
+    # Categorias viram colunas com dicionário; as flags ficam booleanas.
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), f, compression="zstd")
+
+
+# formato: (extensão, mime, writer)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv", write_csv),
+    "CSV (gzip)": ("csv.gz", "application/gzip", write_csv_gzip),
+    "Parquet": ("parquet", "application/vnd.apache.parquet", write_parquet),
+}
+if zstandard is not None:
+    EXPORT_FORMATS["CSV (zstd)"] = ("csv.zst", "application/zstd", write_csv_zstd)
+
+
+def export_bytes(df, fmt):
+    buffer = io.BytesIO()
+    EXPORT_FORMATS[fmt][2](df, buffer)
+    return buffer.getvalue()
+
+
+def dataset_export(fmt):
+    return load_derived(("export", fmt), lambda df: export_bytes(df, fmt))
+
+
+def selection_export(fmt, filters, min_rating=None):
+    # filters: coluna=lista de valores, como em utils.index.select_rows; com
+    # min_rating, só as linhas com aggregate_rating >= min_rating.
+    names = tuple(sorted(filters))
+
+    def build():
+        df = load_data()
+        selected = select_rows(load_index(), **filters)
+        if min_rating is not None:
+            selected &= df["aggregate_rating"].to_numpy() >= min_rating
+        return export_bytes(df.loc[selected, :], fmt)
+
+    return cached_result(
+        "export.selection", (fmt, names, min_rating) + tuple(filters[name] for name in names), build
+    )
+
+
+def download_button(min_rating=None, **filters):
+    # Formato e escopo escolhidos na barra lateral. filters são os filtros da
+    # página (coluna=lista de valores, como em utils.index.select_rows) e
+    # min_rating a nota mínima, se houver; sem filtros, só o dataset completo.
+    fmt = st.sidebar.selectbox("Formato", list(EXPORT_FORMATS), key="export_format")
+    scope = "Todos os dados"
+    if filters or min_rating is not None:
+        scope = st.sidebar.radio("Linhas", ["Todos os dados", "Seleção atual"], key="export_scope")
+
+    extension, mime, _ = EXPORT_FORMATS[fmt]
+    if scope == "Seleção atual":
+        data = selection_export(fmt, filters, min_rating)
+        file_name = f"processed_selection.{extension}"
+    else:
+        data = dataset_export(fmt)
+        file_name = f"processed.{extension}"
+
+    st.sidebar.download_button(
+        label="Download",
+        data=data,
+        file_name=file_name,
+        mime=mime,
+        )
@@ -0,0 +1,144 @@
+import collections
+import importlib.metadata
+import os
+import threading
+
+import streamlit as st
+
+from utils.data import RAW_DATA_PATH
+from utils.memory import deep_size
+from utils.results import result_key
+from utils.timing import span
+
+# Cache das figuras prontas para o navegador.
+#
+# Mesmo com as agregações no cache de resultados (utils.results), cada rerun
+# montava de novo as figuras do plotly express e o JSON delas (35 a 70 ms por
+# gráfico), e o mapa folium com o script Leaflet da camada de restaurantes. Aqui
+# fica o que o Streamlit envia ao navegador para cada figura, com a mesma chave
+# do cache de resultados: (id da figura, filtros normalizados, versão do dataset).
+#
+#   plotly_chart   guarda a mensagem do gráfico serializada, com o JSON da figura
+#                  gerado pelo próprio st.plotly_chart (marshall); a montagem da
+#                  figura (o px.bar das páginas) só roda quando ela não está lá
+#   cached_figure  guarda qualquer texto ou dicionário pronto, como as partes do
+#                  mapa do st_folium (ver utils.maps.map_parts e layer_script)
+#
+# O cache é do processo e limitado pelo total de bytes (deep_size): ao passar de
+# FOME_ZERO_FIGURE_CACHE_MB megabytes (padrão 128; 0 desliga o cache), saem
+# primeiro as figuras usadas há mais tempo.
+#
+# Enviar a mensagem pronta usa funções internas do Streamlit (marshall,
+# st._main._enqueue) e, no mapa, do streamlit_folium, que mudam sem aviso entre
+# versões. Esse caminho (FAST_RENDERING) só é usado com as versões de
+# TESTED_VERSIONS, conferidas com essas funções; com outras versões, ou com
+# FOME_ZERO_PUBLIC_RENDERING=1, as páginas usam só a API pública: plotly_chart
+# guarda o go.Figure e o desenha com st.plotly_chart, e o mapa é montado a cada
+# rerun (ver utils.maps.draw_map).
+
+MAX_MB_ENV = "FOME_ZERO_FIGURE_CACHE_MB"
+PUBLIC_RENDERING_ENV = "FOME_ZERO_PUBLIC_RENDERING"
+
+DEFAULT_MAX_MB = 128
+
+TESTED_VERSIONS = {"streamlit": ["1.28.2"], "streamlit-folium": ["0.15.0"]}
+
+
+def installed_version(package):
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+FAST_RENDERING = not os.environ.get(PUBLIC_RENDERING_ENV) and all(
+    installed_version(package) in versions for package, versions in TESTED_VERSIONS.items()
+)
+
+if FAST_RENDERING:
+    from streamlit.elements.plotly_chart import marshall
+    from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+
+_figures = collections.OrderedDict()  # chave -> (figura, bytes), da menos à mais recente
+_figures_lock = threading.Lock()
+_figures_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+
+def max_bytes():
+    return int(float(os.environ.get(MAX_MB_ENV) or DEFAULT_MAX_MB) * 2**20)
+
+
+def cached_figure(chart_id, filters, build, file_path=RAW_DATA_PATH, size=deep_size):
+    # Devolve a figura em cache para (chart_id, filters) na versão atual do dataset,
+    # chamando build() só quando ela não está no cache. size(figura) dá os bytes
+    # contados no limite do cache.
+    key = result_key(chart_id, filters, file_path)
+    with _figures_lock:
+        entry = _figures.get(key)
+        if entry is not None:
+            _figures.move_to_end(key)
+            _figures_stats["hits"] += 1
+            return entry[0]
+        _figures_stats["misses"] += 1
+
+    with span("figure_miss:" + chart_id):
+        figure = build()
+    store(key, figure, size(figure))
+    return figure
+
+
+def store(key, figure, size):
+    limit = max_bytes()
+    if size > limit:
+        return
+    with _figures_lock:
+        previous = _figures.pop(key, None)
+        if previous is not None:
+            _figures_stats["bytes"] -= previous[1]
+        _figures[key] = (figure, size)
+        _figures_stats["bytes"] += size
+        while _figures_stats["bytes"] > limit:
+            _, (_, evicted) = _figures.popitem(last=False)
+            _figures_stats["bytes"] -= evicted
+            _figures_stats["evictions"] += 1
+
+
+def plotly_message(figure, use_container_width):
+    # A mesma mensagem que st.plotly_chart(figure, use_container_width) monta.
+    proto = PlotlyChartProto()
+    marshall(proto, figure, use_container_width, "streamlit", "streamlit")
+    return proto.SerializeToString()
+
+
+def figure_size(figure):
+    # deep_size não enxerga os dados dentro de um go.Figure.
+    return deep_size(figure.to_dict())
+
+
+def plotly_chart(chart_id, filters, build, use_container_width=True):
+    # Como st.plotly_chart(build(), use_container_width), mas build() (a montagem da
+    # figura) e a serialização só acontecem quando a figura não está no cache.
+    if not FAST_RENDERING:
+        figure = cached_figure(chart_id, filters, build, size=figure_size)
+        return st.plotly_chart(figure, use_container_width=use_container_width)
+    message = cached_figure(
+        chart_id, filters + (use_container_width,), lambda: plotly_message(build(), use_container_width)
+    )
+    # st._main é o DeltaGenerator que o st.plotly_chart usa: dentro de um
+    # `with col1:`, o elemento vai para a coluna ativa.
+    return st._main._enqueue("plotly_chart", PlotlyChartProto.FromString(message))
+
+
+def figure_cache_info():
+    with _figures_lock:
+        hits, misses = _figures_stats["hits"], _figures_stats["misses"]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "evictions": _figures_stats["evictions"],
+            "entries": len(_figures),
+            "bytes": _figures_stats["bytes"],
+            "max_bytes": max_bytes(),
+        }
+
@@ -0,0 +1,211 @@
+# Atualização incremental do dataset tratado a partir de um novo snapshot do Zomato.
+#
+# Uso:
+#     python -m utils.incremental --snapshot novo_zomato.csv [--source dataset/zomato.csv] [--output-dir dataset]
+#
+# Em vez de tratar o snapshot inteiro de novo (python -m utils.etl), compara cada
+# restaurante do snapshot com a versão atual pelo Restaurant ID e por um hash do
+# conteúdo da linha bruta: só as linhas inseridas e alteradas passam pelo
+# transform_data, e as removidas e alteradas saem do dataset tratado, cujas
+# linhas restantes mantêm a posição. Os hashes da versão atual ficam em
+# processed_hashes.feather, então o CSV bruto antigo não precisa ser relido.
+#
+# As linhas alteradas (versões antigas com sign -1, novas com sign +1) são
+# gravadas em processed_delta.feather e referenciadas no manifesto, para que os
+# agregados derivados em memória (cubo, tiles do mapa) sejam atualizados só com
+# elas (ver utils.data.cached). Por fim, o snapshot substitui a fonte.
+#
+# Só os artefatos Arrow (processed.feather e processed_by_country.arrow), que o
+# dashboard lê, são regravados; o processed.csv, cuja escrita custaria mais que
+# todo o resto, é removido e volta no próximo python -m utils.etl.
+#
+# A comparação é feita por Restaurant ID: o hash de um ID cobre todas as suas
+# linhas brutas sem valores nulos, na ordem do arquivo, então um ID com linhas
+# repetidas ou em conflito é tratado de novo sempre que alguma delas muda. As
+# linhas que entram passam pelo transform_data com a política de conflitos do
+# último build (gravada no manifesto, ver utils.dedup), e o resultado tem as
+# mesmas linhas que um build completo do snapshot.
+#
+# Sem artefatos válidos da versão atual, o snapshot passa por um build completo
+# (com a mesma política), e a fonte só é substituída depois que ele termina.
+
+import argparse
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.data import (
+    PROCESSED_DIR,
+    RAW_COLUMNS,
+    RAW_DATA_PATH,
+    apply_schema,
+    artifact_paths,
+    file_digest,
+    read_feather,
+    read_manifest,
+    transform_data,
+)
+from utils.dedup import DEFAULT_CONFLICT_POLICY, fingerprints
+from utils.etl import atomic_write, build, is_up_to_date, write_manifest, write_outputs
+from utils.ingest import READ_DTYPES
+
+ID_COLUMN = "Restaurant ID"
+
+# Artefatos regravados pela atualização incremental.
+INCREMENTAL_FORMATS = ["feather", "countries"]
+
+# Colunas inteiras do CSV bruto: lidas como float quando o arquivo tem nulos
+# nelas, são convertidas de volta depois do dropna para que o hash de uma linha
+# não dependa do resto do arquivo.
+INT_COLUMNS = [column for column in RAW_COLUMNS if column not in READ_DTYPES]
+
+
+def raw_rows(path):
+    raw = pd.read_csv(path, dtype=READ_DTYPES, usecols=RAW_COLUMNS).dropna()
+    return raw.astype({column: "int64" for column in INT_COLUMNS})
+
+
+def content_hashes(raw):
+    # Um hash por Restaurant ID, de todas as linhas dele na ordem do arquivo: a
+    # soma dos hashes das linhas, com o da n-ésima linha do ID (n > 0) misturado a
+    # n. Um ID com uma só linha fica com o hash dela.
+    ids = raw[ID_COLUMN].to_numpy()
+    hashes = fingerprints(raw)
+    position = pd.Series(ids).groupby(ids, sort=False).cumcount().to_numpy().astype(np.uint64)
+    hashes = np.where(position == 0, hashes, pd.util.hash_array(hashes ^ position))
+    combined = pd.Series(hashes).groupby(ids, sort=False).sum()
+    return pd.DataFrame({
+        "restaurant_id": combined.index.to_numpy(),
+        "content_hash": combined.to_numpy(dtype=np.uint64),
+    })
+
+
+def conflict_policy(output_dir):
+    # Política de conflitos do último build (utils.etl), que o build incremental repete.
+    manifest = read_manifest(output_dir) or {}
+    return (manifest.get("dedup") or {}).get("policy", DEFAULT_CONFLICT_POLICY)
+
+
+def current_hashes(source, source_digest, output_dir):
+    # Hashes da versão atual: do arquivo gravado pela última atualização ou, na
+    # primeira vez, calculados a partir do CSV bruto atual.
+    manifest = read_manifest(output_dir) or {}
+    path = artifact_paths(output_dir)["hashes"]
+    if (manifest.get("hashes") or {}).get("source_sha256") == source_digest and os.path.exists(path):
+        return read_feather(path)
+    return content_hashes(raw_rows(source))
+
+
+def diff(old_hashes, new_hashes):
+    # IDs inseridos, alterados e removidos entre as duas versões.
+    merged = old_hashes.merge(new_hashes, on="restaurant_id", how="outer", suffixes=("_old", "_new"), indicator=True)
+    both = merged["_merge"] == "both"
+    return {
+        "inserted": merged.loc[merged["_merge"] == "right_only", "restaurant_id"].to_numpy(),
+        "changed": merged.loc[both & (merged["content_hash_old"] != merged["content_hash_new"]), "restaurant_id"].to_numpy(),
+        "removed": merged.loc[merged["_merge"] == "left_only", "restaurant_id"].to_numpy(),
+    }
+
+
+def concat_rows(frames):
+    # Frames vazios ficam de fora: o pd.concat avisa (FutureWarning) quando os recebe.
+    frames = [frame for frame in frames if not frame.empty] or frames[:1]
+    return pd.concat(frames, ignore_index=True)
+
+
+def apply_delta(old, raw, changes, policy=DEFAULT_CONFLICT_POLICY):
+    # Devolve (dataset atualizado, delta). As linhas alteradas ficam na posição da
+    # versão antiga e as inseridas vão para o fim, na ordem do snapshot. A
+    # deduplicação decide por restaurant_id, então aplicá-la só às linhas dos IDs
+    # que entram dá o mesmo que aplicá-la ao snapshot inteiro.
+    outgoing = old["restaurant_id"].isin(np.concatenate([changes["changed"], changes["removed"]]))
+    incoming = raw[ID_COLUMN].isin(np.concatenate([changes["changed"], changes["inserted"]]))
+    added = apply_schema(transform_data(raw.loc[incoming, :], policy))
+
+    first = ~old["restaurant_id"].duplicated()
+    position = pd.Series(np.flatnonzero(first), index=old.loc[first, "restaurant_id"].to_numpy())
+    added_position = added["restaurant_id"].map(position)
+    inserted = added_position.isna()
+    added_position[inserted] = len(old) + np.arange(inserted.sum())
+
+    updated = concat_rows([
+        old.loc[~outgoing, :].assign(position=np.flatnonzero(~outgoing)),
+        added.assign(position=added_position.astype("int64").to_numpy()),
+    ])
+    updated = updated.sort_values("position", kind="stable").drop(columns="position").reset_index(drop=True)
+
+    delta = concat_rows([old.loc[outgoing, :].assign(sign=-1), added.assign(sign=1)])
+    return apply_schema(updated), apply_schema(delta).astype({"sign": "int8"})
+
+
+def refresh(snapshot, source=RAW_DATA_PATH, output_dir=PROCESSED_DIR):
+    source_digest = file_digest(source)
+    snapshot_digest = file_digest(snapshot)
+    paths = artifact_paths(output_dir)
+    policy = conflict_policy(output_dir)
+
+    if not is_up_to_date(source_digest, output_dir, INCREMENTAL_FORMATS, policy):
+        # Sem artefatos válidos da versão atual não há base para o delta. O build
+        # lê o snapshot, e a fonte só é trocada depois dos artefatos gravados.
+        print(f"{output_dir} is not up to date with {source}, running a full build")
+        built = build(snapshot, output_dir, conflict_policy=policy, recorded_source=source)
+        atomic_write(source, lambda path: shutil.copyfile(snapshot, path))
+        return built
+    if snapshot_digest == source_digest:
+        print(f"{snapshot} is the current source, nothing to do")
+        return False
+
+    start = time.perf_counter()
+    old = read_feather(paths["feather"])
+    raw = raw_rows(snapshot)
+    new_hashes = content_hashes(raw)
+    changes = diff(current_hashes(source, source_digest, output_dir), new_hashes)
+    updated, delta = apply_delta(old, raw, changes, policy)
+
+    atomic_write(paths["delta"], lambda path: delta.to_feather(path, compression="uncompressed"))
+    atomic_write(paths["hashes"], lambda path: new_hashes.to_feather(path, compression="uncompressed"))
+    outputs = write_outputs(updated, output_dir, INCREMENTAL_FORMATS)
+
+    counts = {kind: len(ids) for kind, ids in changes.items()}
+    write_manifest(
+        source,
+        snapshot_digest,
+        outputs,
+        output_dir,
+        source_size=os.path.getsize(snapshot),
+        dedup={"policy": policy},
+        delta={"from_sha256": source_digest, "path": paths["delta"], **counts},
+        hashes={"source_sha256": snapshot_digest, "path": paths["hashes"]},
+    )
+    # A fonte é trocada por último: o dashboard só percebe a nova versão (e lê o
+    # delta) quando o manifesto já a descreve.
+    atomic_write(source, lambda path: shutil.copyfile(snapshot, path))
+    if os.path.exists(paths["csv"]):
+        os.remove(paths["csv"])
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Refreshed {output_dir} from {snapshot} in {elapsed:.2f}s: "
+        f"{counts['inserted']} inserted, {counts['changed']} changed, {counts['removed']} removed "
+        f"({len(updated)} rows)"
+    )
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally apply a new Zomato snapshot.")
+    parser.add_argument("--snapshot", required=True, help="new raw Zomato CSV")
+    parser.add_argument("--source", default=RAW_DATA_PATH, help="current raw Zomato CSV, replaced by the snapshot")
+    parser.add_argument("--output-dir", default=PROCESSED_DIR, help="directory for the processed artifacts")
+    args = parser.parse_args(argv)
+
+    refresh(args.snapshot, args.source, args.output_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
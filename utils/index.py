@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from utils.data import load_derived
+
+# Índice de bitmaps para os filtros da barra lateral.
+#
+# Para cada valor distinto das dimensões abaixo é guardado um bitmap (um bit por
+# linha do dataset, empacotado com np.packbits). Um filtro vira OR entre os
+# bitmaps dos valores escolhidos numa dimensão e AND entre dimensões, e a
+# seleção resultante é compartilhada por todos os gráficos da página.
+
+INDEX_DIMENSIONS = [
+    "country",
+    "cuisines",
+    "price_type",
+    "rating_text",
+    "has_table_booking",
+    "has_online_delivery",
+    "is_delivering_now",
+]
+
+
+def build_index(df):
+    bitmaps = {}
+    for column in INDEX_DIMENSIONS:
+        # Compara códigos inteiros do factorize em vez das strings, uma vez por valor distinto.
+        codes, uniques = pd.factorize(df[column])
+        bitmaps[column] = {value: np.packbits(codes == code) for code, value in enumerate(uniques)}
+    return {"rows": len(df), "bitmaps": bitmaps}
+
+
+def load_index():
+    return load_derived("index", build_index)
+
+
+def empty_bitmap(index, fill=False):
+    bits = np.full(index["rows"], fill, dtype=bool)
+    return np.packbits(bits)
+
+
+def column_bitmap(index, column, values):
+    # OR dos bitmaps dos valores escolhidos; valores que não existem no dataset são ignorados.
+    result = empty_bitmap(index)
+    for value in values:
+        bitmap = index["bitmaps"][column].get(value)
+        if bitmap is not None:
+            result = result | bitmap
+    return result
+
+
+def select_bitmap(index, **filters):
+    # filters: coluna=lista de valores. Colunas omitidas (ou None) não filtram;
+    # uma lista vazia não seleciona nenhuma linha, como Series.isin([]).
+    result = empty_bitmap(index, fill=True)
+    for column, values in filters.items():
+        if values is not None:
+            result = result & column_bitmap(index, column, values)
+    return result
+
+
+def select_rows(index, **filters):
+    # Máscara booleana pronta para df.loc[mask, :].
+    bitmap = select_bitmap(index, **filters)
+    return np.unpackbits(bitmap, count=index["rows"]).astype(bool)
@@ -0,0 +1,314 @@
+# Ingestão em blocos de dumps grandes do Zomato.
+#
+# Uso:
+#     python -m utils.ingest [--source dataset/zomato.csv [outro.csv ...]] [--output-dir dataset/parts]
+#                            [--chunk-size 100000] [--workers 1]
+#
+# Lê cada CSV bruto em blocos de --chunk-size linhas, aplica em cada bloco o mesmo
+# tratamento de utils.data.transform_data e grava cada bloco tratado como uma
+# partição feather (part-000-001-00002.feather: arquivo 0, trecho 1, bloco 2),
+# seguida de um manifesto (parts.json). Com --workers N, cada arquivo é dividido
+# em até N trechos de bytes, sempre num fim de linha fora de campos entre aspas
+# (endereços podem ter quebras de linha), e os trechos de todos os arquivos são
+# tratados por até N processos: um único dump grande também usa todos os workers.
+#
+# Linhas repetidas entre blocos e entre arquivos são descartadas pelo processo
+# principal, depois que todos os blocos foram tratados: os pares (restaurant_id,
+# hash de 64 bits) das linhas tratadas de todas as partições passam por um único
+# sort, que acha a primeira ocorrência de cada par na ordem dos arquivos e dos
+# blocos (como em utils.dedup, uma colisão de hash só junta linhas do mesmo
+# restaurante). A memória de cada worker fica limitada ao bloco atual, e a do
+# processo principal aos pares (16 bytes por linha, mais o sort).
+#
+# O resultado, lido de volta com read_parts, é igual ao de process_data sobre os
+# arquivos concatenados.
+
+import argparse
+import glob
+import io
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pyarrow import feather
+
+from utils.data import (
+    COLUMNS_ORDER,
+    PROCESSED_DIR,
+    RAW_COLUMNS,
+    RAW_DATA_PATH,
+    TRANSFORM_VERSION,
+    apply_schema,
+    file_digest,
+    transform_data,
+)
+from utils.dedup import fingerprints
+from utils.etl import atomic_write, write_json
+
+PARTS_DIR = os.path.join(PROCESSED_DIR, "parts")
+PARTS_MANIFEST = "parts.json"
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Tamanho dos blocos lidos por split_points ao procurar os pontos de divisão.
+SPLIT_BLOCK_BYTES = 1 << 20
+
+# Colunas numéricas lidas sempre como float e textos sempre como str: a inferência
+# de tipos do read_csv é feita bloco a bloco e poderia ler a mesma coluna como int
+# num bloco e float em outro, mudando o hash de linhas iguais.
+FLOAT_COLUMNS = ["Longitude", "Latitude", "Aggregate rating"]
+TEXT_COLUMNS = [
+    "Restaurant Name",
+    "City",
+    "Address",
+    "Locality",
+    "Locality Verbose",
+    "Cuisines",
+    "Currency",
+    "Rating color",
+    "Rating text",
+]
+READ_DTYPES = {
+    **{column: "float64" for column in FLOAT_COLUMNS},
+    **{column: str for column in TEXT_COLUMNS},
+}
+
+
+class ByteRange(io.RawIOBase):
+    # Os próximos length bytes de um arquivo aberto, como um arquivo à parte.
+    def __init__(self, f, length):
+        self.f = f
+        self.remaining = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = self.f.readinto(memoryview(buffer)[:min(len(buffer), self.remaining)])
+        self.remaining -= size
+        return size
+
+
+def split_points(source, pieces):
+    # Posições (em bytes) que dividem o arquivo em até pieces trechos de tamanho
+    # parecido. Cada posição fica logo depois de um fim de linha que não está dentro
+    # de um campo entre aspas: a quantidade de aspas antes dele é par (aspas
+    # escapadas, "", não mudam a paridade).
+    size = os.path.getsize(source)
+    targets = iter([size * number // pieces for number in range(1, pieces)])
+    target = next(targets, None)
+    points = []
+    quotes = offset = 0  # aspas antes do bloco atual e posição dele no arquivo
+    with open(source, "rb") as f:
+        header = len(f.readline())
+        offset = header
+        for block in iter(lambda: f.read(SPLIT_BLOCK_BYTES), b""):
+            search = 0
+            while target is not None:
+                newline = block.find(b"\n", max(target - offset, search))
+                if newline < 0:
+                    break
+                search = newline + 1
+                if (quotes + block.count(b'"', 0, newline)) % 2 == 0:
+                    point = offset + newline + 1
+                    if header < point < size and (not points or point > points[-1]):
+                        points.append(point)
+                    while target is not None and target < point:
+                        target = next(targets, None)
+            quotes += block.count(b'"')
+            offset += len(block)
+    return points
+
+
+def file_segments(source, pieces):
+    # [(início, fim)] em bytes dos trechos do arquivo; o primeiro inclui o cabeçalho.
+    bounds = [0] + (split_points(source, pieces) if pieces > 1 else []) + [os.path.getsize(source)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def read_chunks(source, chunk_size, start=0, end=None):
+    # Linhas do trecho [start, end) do arquivo, em blocos de chunk_size linhas. Os
+    # trechos depois do primeiro não têm cabeçalho: os nomes das colunas são lidos
+    # da primeira linha do arquivo.
+    end = os.path.getsize(source) if end is None else end
+    names = None if start == 0 else pd.read_csv(source, nrows=0).columns.tolist()
+    with open(source, "rb") as f:
+        f.seek(start)
+        stream = io.BufferedReader(ByteRange(f, end - start))
+        yield from pd.read_csv(
+            stream,
+            chunksize=chunk_size,
+            dtype=READ_DTYPES,
+            usecols=RAW_COLUMNS,
+            header=0 if names is None else None,
+            names=names,
+        )
+
+
+def part_path(output_dir, file_number, segment_number, chunk_number):
+    return os.path.join(output_dir, f"part-{file_number:03d}-{segment_number:03d}-{chunk_number:05d}.feather")
+
+
+def write_part(df, path):
+    atomic_write(path, lambda tmp: feather.write_feather(df, tmp, compression="uncompressed"))
+
+
+def ingest_segment(task):
+    # Executado nos workers: trata um trecho de um arquivo bruto bloco a bloco e
+    # grava cada bloco como uma partição. Devolve, por partição, o caminho e os
+    # restaurant_id e hashes das linhas, usados pelo processo principal na
+    # deduplicação.
+    source, start, end, output_dir, chunk_size, file_number, segment_number = task
+    parts = []
+    for chunk_number, chunk in enumerate(read_chunks(source, chunk_size, start, end)):
+        # Tipos do SCHEMA antes do hash: as categorias são comparadas pelo valor.
+        df = apply_schema(transform_data(chunk)).reset_index(drop=True)
+        path = part_path(output_dir, file_number, segment_number, chunk_number)
+        write_part(df, path)
+        parts.append(
+            {"path": path, "rows_read": len(chunk), "ids": df["restaurant_id"].to_numpy(), "hashes": fingerprints(df)}
+        )
+    return parts
+
+
+def first_seen(ids, hashes):
+    # Máscara das linhas cujo par (id, hash) aparece pela primeira vez, na ordem
+    # dada. O np.lexsort é estável: em cada grupo de pares iguais, a primeira linha
+    # da ordem ordenada é a primeira ocorrência.
+    order = np.lexsort((ids, hashes))
+    sorted_ids, sorted_hashes = ids[order], hashes[order]
+    starts = np.ones(len(order), dtype=bool)
+    starts[1:] = (sorted_ids[1:] != sorted_ids[:-1]) | (sorted_hashes[1:] != sorted_hashes[:-1])
+    keep = np.zeros(len(order), dtype=bool)
+    keep[order[starts]] = True
+    return keep
+
+
+def keep_rows(path, keep):
+    # Regrava a partição só com as linhas de keep, ou a apaga se ficar vazia.
+    # Devolve a quantidade de linhas mantidas.
+    if not keep.all():
+        df = feather.read_feather(path).loc[keep, :].reset_index(drop=True)
+        if df.empty:
+            os.remove(path)
+        else:
+            write_part(df, path)
+    return int(keep.sum())
+
+
+def ingest(sources=(RAW_DATA_PATH,), output_dir=PARTS_DIR, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    # sources: um ou mais CSVs brutos (por exemplo, exportações regionais). Com
+    # workers > 1, cada arquivo é dividido em até workers trechos, tratados em
+    # paralelo por até workers processos.
+    if isinstance(sources, str):
+        sources = [sources]
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    tasks = [
+        (source, first, last, output_dir, chunk_size, file_number, segment_number)
+        for file_number, source in enumerate(sources)
+        for segment_number, (first, last) in enumerate(file_segments(source, max(workers, 1)))
+    ]
+    if workers > 1 and len(tasks) > 1:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(tasks)))
+        results = executor.map(ingest_segment, tasks)
+    else:
+        executor = None
+        results = map(ingest_segment, tasks)
+
+    written = []
+    rows_read = 0
+    try:
+        # map devolve os resultados na ordem dos arquivos e dos trechos, então a linha
+        # mantida entre repetidas é sempre a primeira, como no drop_duplicates de
+        # process_data.
+        for task, segment_parts in zip(tasks, results):
+            written += segment_parts
+            rows_read += sum(part["rows_read"] for part in segment_parts)
+            elapsed = time.perf_counter() - start
+            print(f"{task[0]} [{task[1]:,}-{task[2]:,}): {rows_read:,} rows read ({rows_read / elapsed:,.0f} rows/s)")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    parts = []
+    rows_written = 0
+    if written:
+        keep = first_seen(
+            np.concatenate([part["ids"] for part in written]),
+            np.concatenate([part["hashes"] for part in written]),
+        )
+        bounds = np.cumsum([0] + [len(part["hashes"]) for part in written])
+        for part, first, last in zip(written, bounds[:-1], bounds[1:]):
+            rows = keep_rows(part["path"], keep[first:last])
+            if rows:
+                parts.append({"path": os.path.basename(part["path"]), "rows": rows})
+                rows_written += rows
+
+    elapsed = time.perf_counter() - start
+    manifest = {
+        "transform_version": TRANSFORM_VERSION,
+        "sources": [
+            {"path": source, "size": os.path.getsize(source), "sha256": file_digest(source)}
+            for source in sources
+        ],
+        "chunk_size": chunk_size,
+        "workers": workers,
+        "rows_read": rows_read,
+        "rows": rows_written,
+        "parts": parts,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows_read / elapsed) if elapsed else None,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    # Como no utils.etl, o manifesto é gravado por último; partições de um build
+    # anterior que não fazem parte dele são removidas em seguida.
+    atomic_write(os.path.join(output_dir, PARTS_MANIFEST), lambda path: write_json(path, manifest))
+    current = {part["path"] for part in parts}
+    for path in glob.glob(os.path.join(output_dir, "part-*.feather")):
+        if os.path.basename(path) not in current:
+            os.remove(path)
+
+    # ru_maxrss é em KiB no Linux; com workers, o pico é o do maior processo filho.
+    peak_mb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    ) / 1024
+    print(
+        f"Ingested {rows_read:,} rows from {len(sources)} files into {len(parts)} parts ({rows_written:,} kept) "
+        f"in {elapsed:.2f}s: {rows_read / elapsed:,.0f} rows/s, peak RSS {peak_mb:,.0f} MB"
+    )
+    return manifest
+
+
+def read_parts(output_dir=PARTS_DIR, columns=None):
+    # Junta as partições listadas no manifesto. As categorias de cada partição são
+    # diferentes, então o SCHEMA é aplicado de novo depois do concat.
+    with open(os.path.join(output_dir, PARTS_MANIFEST), encoding="utf-8") as f:
+        parts = json.load(f)["parts"]
+    frames = [feather.read_feather(os.path.join(output_dir, part["path"]), columns=columns) for part in parts]
+    if not frames:
+        return apply_schema(pd.DataFrame(columns=columns or COLUMNS_ORDER))
+    return apply_schema(pd.concat(frames, ignore_index=True))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chunked ingestion of a raw Zomato dump.")
+    parser.add_argument("--source", nargs="+", default=[RAW_DATA_PATH], help="raw Zomato CSV files")
+    parser.add_argument("--output-dir", default=PARTS_DIR, help="directory for the partitions")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (each file is split into this many byte ranges)")
+    args = parser.parse_args(argv)
+
+    ingest(args.source, args.output_dir, args.chunk_size, args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+import json
+import math
+
+import folium
+import pandas as pd
+import streamlit as st
+from folium.plugins import MarkerCluster
+from jinja2 import Template
+from streamlit_folium import st_folium
+
+from utils.figures import FAST_RENDERING, cached_figure
+
+if FAST_RENDERING:
+    from streamlit_folium import (
+        _component_func,
+        _get_feature_group_string,
+        _get_map_string,
+        _get_siblings,
+        generate_js_hash,
+        get_full_id,
+    )
+
+# Mapa de restaurantes da página principal.
+#
+# marker_map cria um folium.Marker com Popup em HTML para cada restaurante (a
+# implementação original). cluster_map envia todos os pontos como um único
+# objeto JSON em colunas, com os textos repetidos (cor, moeda, culinária)
+# trocados por códigos; os marcadores são criados e agrupados no navegador e o
+# HTML do popup só é montado quando o usuário clica no marcador.
+#
+# Com st_folium, marker_layer e density_layer montam apenas a camada da janela
+# visível do mapa (ver utils.tiles), adicionada ao mapa base sem recarregá-lo.
+#
+# map_parts e layer_script produzem os textos que o st_folium envia ao navegador
+# (o mapa base e a camada), e show_map os envia. As páginas guardam esses textos
+# no cache de figuras (utils.figures) e, numa janela já vista, não montam nada.
+# Esse caminho usa funções internas do streamlit_folium; sem FAST_RENDERING (ver
+# utils.figures), base_map e draw_map montam o mapa a cada rerun e o desenham
+# com o st_folium público.
+
+POPUP_HTML = (
+    "<p><strong>{}</strong></p>"
+    "<p>Price: {},00 ({}) para dois"
+    "<br />Type: {}"
+    "<br />Aggregate Rating: {}/5.0"
+)
+
+# Casas decimais das coordenadas enviadas ao navegador (~0,1 m).
+COORDINATE_DECIMALS = 6
+
+
+def create_figure(**kwargs):
+    f = folium.Figure(width=1920, height=1080)
+    return folium.Map(max_bounds=True, **kwargs).add_to(f)
+
+
+def marker_map(dataframe):
+    m = create_figure()
+    marker_cluster = MarkerCluster().add_to(m)
+
+    for _, line in dataframe.iterrows():
+
+        name = line["restaurant_name"]
+        price_for_two = line["average_cost_for_two"]
+        cuisine = line["cuisines"]
+        currency = line["currency"]
+        rating = line["aggregate_rating"]
+        color = f'{line["color_name"]}'
+
+        html = POPUP_HTML.format(name, price_for_two, currency, cuisine, rating)
+
+        popup = folium.Popup(
+            folium.Html(html, script=True),
+            max_width=500,
+        )
+
+        folium.Marker(
+            [line["latitude"], line["longitude"]],
+            popup=popup,
+            icon=folium.Icon(color=color, icon="home", prefix="fa"),
+        ).add_to(marker_cluster)
+
+    return m
+
+
+def encode(series):
+    # (códigos, valores distintos): cada texto repetido é enviado uma única vez.
+    codes, uniques = pd.factorize(series)
+    return codes.tolist(), [str(value) for value in uniques]
+
+
+def compact_points(dataframe):
+    color, colors = encode(dataframe["color_name"])
+    currency, currencies = encode(dataframe["currency"])
+    cuisine, cuisines = encode(dataframe["cuisines"])
+    return {
+        "lat": dataframe["latitude"].round(COORDINATE_DECIMALS).tolist(),
+        "lon": dataframe["longitude"].round(COORDINATE_DECIMALS).tolist(),
+        "name": dataframe["restaurant_name"].astype(str).tolist(),
+        "cost": dataframe["average_cost_for_two"].tolist(),
+        "rating": dataframe["aggregate_rating"].tolist(),
+        "color": color,
+        "colors": colors,
+        "currency": currency,
+        "currencies": currencies,
+        "cuisine": cuisine,
+        "cuisines": cuisines,
+    }
+
+
+class CompactMarkerCluster(MarkerCluster):
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var data = {{ this.data }};
+                var cluster = L.markerClusterGroup({{ this.options|tojson }});
+
+                var escape = function (text) {
+                    return String(text).replace(/[&<>"']/g, function (c) {
+                        return "&#" + c.charCodeAt(0) + ";";
+                    });
+                };
+                var popup = function (i) {
+                    return function () {
+                        return "<p><strong>" + escape(data.name[i]) + "</strong></p>"
+                            + "<p>Price: " + data.cost[i] + ",00 ("
+                            + escape(data.currencies[data.currency[i]]) + ") para dois"
+                            + "<br />Type: " + escape(data.cuisines[data.cuisine[i]])
+                            + "<br />Aggregate Rating: " + data.rating[i].toFixed(1) + "/5.0";
+                    };
+                };
+                var icons = data.colors.map(function (color) {
+                    return L.AwesomeMarkers.icon({
+                        extraClasses: "fa-rotate-0",
+                        icon: "home",
+                        iconColor: "white",
+                        markerColor: color,
+                        prefix: "fa"
+                    });
+                });
+
+                var markers = new Array(data.lat.length);
+                for (var i = 0; i < data.lat.length; i++) {
+                    var marker = L.marker([data.lat[i], data.lon[i]], {icon: icons[data.color[i]]});
+                    marker.bindPopup(popup(i), {maxWidth: 500});
+                    markers[i] = marker;
+                }
+                cluster.addLayers(markers);
+
+                cluster.addTo({{ this._parent.get_name() }});
+                return cluster;
+            })();
+        {% endmacro %}"""
+    )
+
+    def __init__(self, dataframe, **kwargs):
+        # chunkedLoading: o navegador cria os clusters em lotes sem travar a página.
+        kwargs.setdefault("chunked_loading", True)
+        super().__init__(**kwargs)
+        self._name = "CompactMarkerCluster"
+        # "</" é escapado para que um nome de restaurante não feche a tag <script>.
+        self.data = json.dumps(compact_points(dataframe), ensure_ascii=False).replace("</", "<\\/")
+
+
+def cluster_map(dataframe):
+    m = create_figure()
+    CompactMarkerCluster(dataframe).add_to(m)
+    return m
+
+
+def map_parts(m, key, returned_objects):
+    # Os mesmos argumentos que o st_folium(m, key=key, returned_objects=...) passa ao
+    # componente para o mapa base. "key" é a key do componente, derivada do
+    # JavaScript do mapa: com ela, a última janela devolvida pelo navegador
+    # (bounds/zoom, último clique) pode ser lida em st.session_state antes de
+    # desenhar o mapa nesta execução.
+    m.render()
+    script = _get_map_string(m)
+    (south, west), (north, east) = m.get_bounds()
+    initial = {
+        "bounds": {"_southWest": {"lat": south, "lng": west}, "_northEast": {"lat": north, "lng": east}},
+        "zoom": m.options.get("zoom"),
+    }
+    return {
+        "script": script,
+        "html": _get_siblings(m),
+        "id": get_full_id(m),
+        "key": generate_js_hash(script, key, False),
+        "returned_objects": list(returned_objects),
+        "default": {name: initial.get(name) for name in returned_objects},
+    }
+
+
+def layer_script(layer):
+    # JavaScript da camada (feature_group_to_add do st_folium). O nome do mapa é
+    # trocado por map_div, então qualquer mapa base serve para gerá-lo.
+    return _get_feature_group_string(layer, create_figure())
+
+
+def show_map(parts, layer, width, height):
+    # parts: map_parts do mapa base; layer: layer_script da camada.
+    return _component_func(
+        script=parts["script"],
+        html=parts["html"],
+        id=parts["id"],
+        key=parts["key"],
+        height=height,
+        width=width,
+        returned_objects=parts["returned_objects"],
+        default=parts["default"],
+        zoom=None,
+        center=None,
+        feature_group=layer,
+        return_on_hover=False,
+    )
+
+
+def base_map(chart_id, filters, build, key, returned_objects):
+    # (mapa base, última janela devolvida pelo navegador para ele), com a janela
+    # (bounds/zoom, último clique) lida antes de desenhar o mapa nesta execução.
+    # build() monta o folium.Map; o mapa base vai para draw_map.
+    if FAST_RENDERING:
+        parts = cached_figure(chart_id, filters, lambda: map_parts(build(), key, returned_objects))
+        return parts, st.session_state.get(parts["key"])
+    # O caminho público guarda o último valor devolvido pelo st_folium em
+    # st.session_state, separado por mapa base (como a key do componente).
+    base = {
+        "build": build,
+        "key": key,
+        "view_key": f"{key}:{chart_id}:{filters!r}",
+        "returned_objects": list(returned_objects),
+    }
+    return base, st.session_state.get(base["view_key"])
+
+
+def draw_map(base, chart_id, filters, build_layer, width, height):
+    # Desenha o mapa base de base_map com a camada build_layer() (um FeatureGroup),
+    # guardada no cache de figuras por (chart_id, filters) no caminho rápido.
+    if FAST_RENDERING:
+        layer = cached_figure(chart_id, filters, lambda: layer_script(build_layer()))
+        return show_map(base, layer, width, height)
+    # O folium.Map e a camada são montados a cada rerun: o render do folium altera
+    # os objetos, que não podem ser compartilhados entre sessões.
+    view = st_folium(
+        base["build"](),
+        key=base["key"],
+        width=width,
+        height=height,
+        returned_objects=base["returned_objects"],
+        feature_group_to_add=build_layer(),
+    )
+    # A janela devolvida só chega depois do desenho: se ela mudou, a página roda de
+    # novo para montar a camada da nova janela.
+    previous = st.session_state.get(base["view_key"])
+    st.session_state[base["view_key"]] = view
+    if previous is not None and view != previous:
+        st.rerun()
+    return view
+
+
+def marker_layer(dataframe):
+    layer = folium.FeatureGroup(name="Restaurantes")
+    CompactMarkerCluster(dataframe).add_to(layer)
+    return layer
+
+
+def density_layer(cells):
+    # Um círculo por célula visível (ver utils.tiles.viewport_cells), com raio pela
+    # quantidade de restaurantes e cor pela color_name mais frequente da célula.
+    layer = folium.FeatureGroup(name="Restaurantes")
+    for cell in cells.itertuples(index=False):
+        folium.CircleMarker(
+            location=[cell.latitude, cell.longitude],
+            radius=6 + 4 * math.log10(cell.restaurants),
+            color=cell.color_name,
+            fill=True,
+            fill_opacity=0.6,
+            weight=1,
+            tooltip=f"{cell.restaurants} restaurantes - nota média {cell.aggregate_rating:.1f}/5.0",
+        ).add_to(layer)
+    return layer
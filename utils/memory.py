@@ -0,0 +1,158 @@
+import collections
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from utils.data import cache_info, cache_items
+
+logger = logging.getLogger(__name__)
+
+# Contagem de memória do dashboard.
+#
+# frame_sizes mede os dataframes (e Series e arrays) que uma página mantém nas
+# suas variáveis, e cache_sizes as entradas do cache de processo (utils.data),
+# compartilhadas por todas as sessões. Uma variável da página que é o próprio
+# objeto do cache aparece como compartilhada: não custa memória por sessão.
+#
+# start_monitor inicia uma thread que amostra o RSS do processo a cada
+# RSS_SAMPLE_SECONDS (o histórico fica em rss_history) e, com a variável de
+# ambiente FOME_ZERO_MEMORY_LOG, acrescenta a esse arquivo uma linha JSON com o
+# RSS, o tamanho do cache e os acertos e faltas dele a cada
+# FOME_ZERO_MEMORY_LOG_INTERVAL segundos.
+#
+# Com FOME_ZERO_TRACEMALLOC=<n>, o tracemalloc é ligado guardando n frames por
+# alocação, e cada rerun passa a informar os maiores alocadores (ver
+# utils.timing.finish_rerun). O tracemalloc é do processo: as alocações de
+# sessões simultâneas entram no rerun que estiver em andamento.
+
+MEMORY_LOG_ENV = "FOME_ZERO_MEMORY_LOG"
+MEMORY_LOG_INTERVAL_ENV = "FOME_ZERO_MEMORY_LOG_INTERVAL"
+TRACEMALLOC_ENV = "FOME_ZERO_TRACEMALLOC"
+
+DEFAULT_LOG_INTERVAL = 60
+
+RSS_SAMPLE_SECONDS = 5
+RSS_SAMPLES = 720  # uma hora de histórico
+
+_samples = collections.deque(maxlen=RSS_SAMPLES)
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def rss_bytes():
+    # RSS atual; sem /proc (fora do Linux), o pico informado pelo getrusage.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def deep_size(value):
+    # Bytes de value contando o conteúdo: dataframes e Series com deep=True (textos
+    # e categorias incluídos), arrays pelo buffer e contêineres pela soma dos itens.
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True, index=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(deep_size(k) + deep_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(deep_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def cache_sizes():
+    rows = [
+        {"entry": ":".join(str(part) for part in key if part is not None), "bytes": deep_size(data)}
+        for key, data in cache_items()
+    ]
+    return pd.DataFrame(rows, columns=["entry", "bytes"]).sort_values("bytes", ascending=False, ignore_index=True)
+
+
+def frame_sizes(namespace):
+    # Dataframes, Series e arrays entre as variáveis de namespace (ex.: globals() da página).
+    shared = {id(data) for _, data in cache_items()}
+    rows = [
+        {
+            "name": name,
+            "type": type(value).__name__,
+            "rows": len(value),
+            "bytes": deep_size(value),
+            "shared": id(value) in shared,
+        }
+        for name, value in namespace.items()
+        if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)) and not name.startswith("_")
+    ]
+    columns = ["name", "type", "rows", "bytes", "shared"]
+    return pd.DataFrame(rows, columns=columns).sort_values("bytes", ascending=False, ignore_index=True)
+
+
+def rss_history():
+    return pd.DataFrame(list(_samples), columns=["time", "rss_bytes"])
+
+
+def log_interval():
+    return float(os.environ.get(MEMORY_LOG_INTERVAL_ENV) or DEFAULT_LOG_INTERVAL)
+
+
+def write_log(path):
+    cache = cache_sizes()
+    info = cache_info()
+    record = {
+        "time": time.time(),
+        "rss_bytes": rss_bytes(),
+        "cache_bytes": int(cache["bytes"].sum()),
+        "cache_entries": len(cache),
+        "cache_hits": info["hits"],
+        "cache_misses": info["misses"],
+    }
+    logger.info("RSS %.0f MB, process cache %.0f MB in %d entries (%d hits, %d misses)",
+                record["rss_bytes"] / 2**20, record["cache_bytes"] / 2**20, record["cache_entries"],
+                record["cache_hits"], record["cache_misses"])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def monitor():
+    last_log = 0.0
+    while True:
+        now = time.time()
+        _samples.append((now, rss_bytes()))
+        path = os.environ.get(MEMORY_LOG_ENV)
+        if path and now - last_log >= log_interval():
+            try:
+                write_log(path)
+            except Exception:
+                logger.exception("Could not write the memory log to %s", path)
+            last_log = now
+        time.sleep(RSS_SAMPLE_SECONDS)
+
+
+def start_monitor():
+    # Idempotente: uma thread por processo, iniciada no primeiro rerun que pedir.
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = threading.Thread(target=monitor, name="memory-monitor", daemon=True)
+            _monitor.start()
+
+
+def start_tracing():
+    frames = os.environ.get(TRACEMALLOC_ENV)
+    if frames and not tracemalloc.is_tracing():
+        tracemalloc.start(int(frames))
@@ -0,0 +1,184 @@
+import utils.cube as cube
+from utils.data import load_countries, load_data
+from utils.index import load_index, select_rows
+from utils.ranking import best_row, load_ranking, top_rows, top_rows_by_values
+from utils.results import cached_result
+from utils.timing import span
+
+# Consultas do dashboard, sem Streamlit.
+#
+# As métricas das páginas (totais da página principal, médias por país, cidades
+# com mais restaurantes, melhor restaurante de cada culinária...) são calculadas
+# aqui, a partir das estruturas derivadas do dataset (cubo, ranking e índice), e
+# guardadas no cache de resultados (utils.results) pelos filtros e pela versão do
+# dataset. As páginas e a API JSON (utils.api) usam estas funções, e outros
+# serviços podem importá-las diretamente. Os resultados são compartilhados: não
+# devem ser alterados in place.
+#
+# countries e cuisines são listas de valores, como as dos multiselects; None não
+# filtra (todos os países ou todas as culinárias).
+
+OVERVIEW_COLUMNS = ["restaurant_id", "country", "city", "votes", "cuisines"]
+
+# Culinárias das métricas da página Cuisines.
+BEST_CUISINES = ["Italian", "American", "Arabian", "Japanese", "Brazilian"]
+
+BEST_RESTAURANT_COLUMNS = [
+    "restaurant_id",
+    "restaurant_name",
+    "country",
+    "city",
+    "cuisines",
+    "average_cost_for_two",
+    "currency",
+    "aggregate_rating",
+    "votes",
+]
+
+TOP_RESTAURANT_COLUMNS = [
+    "restaurant_id",
+    "restaurant_name",
+    "country",
+    "city",
+    "cuisines",
+    "average_cost_for_two",
+    "aggregate_rating",
+    "votes",
+]
+
+CITY_MEASURES = ["restaurants", "rating_above_4", "rating_below_2_5"]
+
+MEAN_COLUMNS = ["votes", "average_cost_for_two"]
+
+
+# --------------
+# Página principal
+# --------------
+
+def overview(countries=None):
+    # Totais da página principal para os países escolhidos.
+    def compute():
+        if countries is None:
+            df = load_data(columns=OVERVIEW_COLUMNS)
+        else:
+            df = load_countries(countries, columns=OVERVIEW_COLUMNS)
+        return {
+            "restaurants": int(df["restaurant_id"].nunique()),
+            "countries": int(df["country"].nunique()),
+            "cities": int(df["city"].nunique()),
+            "votes": int(df["votes"].sum()),
+            "cuisines": int(df["cuisines"].nunique()),
+        }
+
+    return cached_result("main.overview", (countries,), compute)
+
+
+# --------------
+# Páginas Countries e Cities (cubo de agregados)
+# --------------
+
+def country_cells(countries):
+    cells = cube.load_cube()
+    return cells if countries is None else cube.select_cells(cells, countries)
+
+
+def restaurants_by_country(countries=None):
+    return cached_result(
+        "countries.restaurants_by_country", (countries,), lambda: cube.restaurants_by_country(country_cells(countries))
+    )
+
+
+def cities_by_country(countries=None):
+    return cached_result(
+        "countries.cities_by_country", (countries,), lambda: cube.cities_by_country(country_cells(countries))
+    )
+
+
+def mean_by_country(countries=None, column="votes"):
+    # column: "votes" ou "average_cost_for_two"
+    if column not in MEAN_COLUMNS:
+        raise ValueError(f"column must be one of {MEAN_COLUMNS}, got {column!r}")
+    return cached_result(
+        "countries.mean_by_country", (countries, column), lambda: cube.mean_by_country(country_cells(countries), column)
+    )
+
+
+def restaurants_by_city(countries=None, measure="restaurants"):
+    # Cidades com mais restaurantes (todos, com nota acima de 4 ou abaixo de 2,5).
+    if measure not in CITY_MEASURES:
+        raise ValueError(f"measure must be one of {CITY_MEASURES}, got {measure!r}")
+    return cached_result(
+        "cities.restaurants_by_city",
+        (countries, measure),
+        lambda: cube.restaurants_by_city(country_cells(countries), measure),
+    )
+
+
+def cuisines_by_city(countries=None):
+    return cached_result(
+        "cities.cuisines_by_city", (countries,), lambda: cube.cuisines_by_city(country_cells(countries))
+    )
+
+
+# --------------
+# Página Cuisines
+# --------------
+
+def top_cuisines(df, ranking, cuisines=BEST_CUISINES):
+    # {culinária: dados do melhor restaurante}, pela nota (alta) e pelo ID (baixo),
+    # já ordenados no ranking pré-calculado.
+    best = {}
+    for cuisine in cuisines:
+        row = best_row(ranking, "cuisines", cuisine)
+        best[cuisine] = None if row is None else df.iloc[row][BEST_RESTAURANT_COLUMNS].to_dict()
+    return best
+
+
+def best_restaurants():
+    def compute():
+        with span("load_data"):
+            df = load_data()
+        with span("load_ranking"):
+            ranking = load_ranking()
+        return top_cuisines(df, ranking)
+
+    return cached_result("cuisines.top_cuisines", (), compute)
+
+
+def top_restaurant_rows(ranking, index, countries, cuisines, n):
+    # Posições dos n melhores restaurantes. Com um só filtro, pelas listas TOP_K
+    # das culinárias ou dos países; com os dois (ou quando as listas não bastam),
+    # percorre o ranking com a seleção do índice.
+    rows = None
+    if countries is None and cuisines is not None:
+        rows = top_rows_by_values(ranking, "cuisines", cuisines, n)
+    elif cuisines is None and countries is not None:
+        rows = top_rows_by_values(ranking, "country", countries, n)
+    if rows is None:
+        rows = top_rows(ranking, select_rows(index, country=countries, cuisines=cuisines), n)
+    return rows
+
+
+def top_restaurants(countries=None, cuisines=None, n=10):
+    # Os n melhores restaurantes dos países e culinárias escolhidos.
+    def compute():
+        rows = top_restaurant_rows(load_ranking(), load_index(), countries, cuisines, n)
+        return load_data().iloc[rows][TOP_RESTAURANT_COLUMNS]
+
+    return cached_result("cuisines.top_restaurants", (countries, cuisines, n), compute)
+
+
+def rating_by_cuisine(df, n, ascending=False):
+    # Média da avaliação por tipo de culinária: os n melhores (ou os piores, com ascending=True).
+    return (df.loc[:, ['cuisines', 'aggregate_rating']]
+            .groupby('cuisines', observed=True)
+            .mean()
+            .sort_values('aggregate_rating', ascending=ascending)
+            .reset_index()
+            .head(n))
+
+
+def cuisine_ratings(n, ascending=False):
+    return cached_result(
+        "cuisines.rating_by_cuisine", (n, ascending), lambda: rating_by_cuisine(load_data(), n, ascending)
+    )
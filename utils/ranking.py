@@ -0,0 +1,90 @@
+import heapq
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from utils.data import load_derived
+
+# Ranking pré-calculado dos restaurantes.
+#
+# order guarda as posições das linhas do dataset na ordem das páginas:
+# aggregate_rating decrescente e restaurant_id crescente (empates mantêm a
+# ordem original, como no sort_values das páginas). Para cada culinária e
+# cada país também são guardadas as TOP_K primeiras posições desse ranking,
+# de modo que "o melhor restaurante" e os "Top N" não precisam ordenar nada:
+# com um só filtro (culinárias ou países), o Top N junta essas listas
+# (top_rows_by_values); com os dois, percorre o ranking até achar N linhas da
+# seleção (top_rows).
+
+TOP_K = 20  # valor máximo do slider de restaurantes da página Cuisines
+
+RANKED_DIMENSIONS = ["cuisines", "country"]
+
+# Tamanho dos blocos lidos por top_rows antes de conferir se já há linhas suficientes.
+SCAN_CHUNK = 4096
+
+
+def build_ranking(df):
+    order = np.lexsort((df["restaurant_id"].to_numpy(), -df["aggregate_rating"].to_numpy()))
+
+    top = {}
+    for column in RANKED_DIMENSIONS:
+        codes, uniques = pd.factorize(df[column])
+        ranked_codes = codes[order]
+        # Posições no ranking agrupadas por valor, mantendo a ordem do ranking em cada grupo.
+        by_value = np.argsort(ranked_codes, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(np.bincount(ranked_codes, minlength=len(uniques)))))
+        top[column] = {
+            value: by_value[starts[code]:min(starts[code] + TOP_K, starts[code + 1])]
+            for code, value in enumerate(uniques)
+        }
+
+    return {"order": order, "top": top}
+
+
+def load_ranking():
+    return load_derived("ranking", build_ranking)
+
+
+def best_row(ranking, column, value):
+    # Posição da linha do melhor restaurante com column == value (None se não houver).
+    ranks = ranking["top"][column].get(value)
+    if ranks is None or len(ranks) == 0:
+        return None
+    return ranking["order"][ranks[0]]
+
+
+def top_rows_by_values(ranking, column, values, n):
+    # Top n entre as linhas com column em values: junta as listas TOP_K de cada
+    # valor, já ordenadas pelo ranking, com um heap merge. Uma lista com TOP_K
+    # posições pode ter sido cortada, e depois da última posição dela o merge já
+    # não tem todas as linhas: se as n linhas não aparecem antes disso (n > TOP_K),
+    # devolve None e a consulta fica com top_rows.
+    if n > TOP_K:
+        return None
+    top = ranking["top"][column]
+    lists = [top[value] for value in dict.fromkeys(values) if value in top]
+    bound = min((ranks[-1] for ranks in lists if len(ranks) == TOP_K), default=None)
+    ranks = list(itertools.islice(heapq.merge(*lists), n))
+    if bound is not None and (len(ranks) < n or ranks[-1] > bound):
+        return None
+    return ranking["order"][np.array(ranks, dtype=np.int64)]
+
+
+def top_rows(ranking, selected, n):
+    # Top n entre as linhas selecionadas (máscara booleana, como a de utils.index.select_rows):
+    # percorre o ranking em blocos e para assim que encontra n linhas.
+    order = ranking["order"]
+    found = []
+    count = 0
+    for start in range(0, len(order), SCAN_CHUNK):
+        rows = order[start:start + SCAN_CHUNK]
+        rows = rows[selected[rows]]
+        found.append(rows)
+        count += len(rows)
+        if count >= n:
+            break
+    if not found:
+        return np.array([], dtype=np.int64)
+    return np.concatenate(found)[:n]
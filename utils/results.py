@@ -0,0 +1,113 @@
+import collections
+import os
+import threading
+
+from utils.data import RAW_DATA_PATH, dataset_version
+from utils.memory import deep_size
+from utils.timing import span
+
+# Cache de resultados das agregações das páginas, pelo estado dos filtros.
+#
+# As mesmas combinações de filtros (países, culinárias, quantidade de
+# restaurantes) se repetem entre reruns e sessões. O resultado de cada
+# agregação fica guardado pela chave (nome, filtros normalizados, versão do
+# dataset). A versão é o sha256 do arquivo de origem (utils.data.dataset_version):
+# depois de uma atualização dos dados, as entradas antigas não são mais usadas e
+# saem pelo LRU.
+#
+# O cache é do processo, compartilhado por todas as sessões como o de utils.data,
+# e limitado pela quantidade de entradas e pelo total de bytes (deep_size). Ao
+# passar de um dos limites, saem primeiro as entradas usadas há mais tempo. Os
+# resultados devolvidos são compartilhados: as páginas não devem alterá-los in
+# place.
+#
+#   FOME_ZERO_RESULT_CACHE_ENTRIES  máximo de entradas (padrão 512; 0 desliga o cache)
+#   FOME_ZERO_RESULT_CACHE_MB       máximo de megabytes (padrão 64)
+
+MAX_ENTRIES_ENV = "FOME_ZERO_RESULT_CACHE_ENTRIES"
+MAX_MB_ENV = "FOME_ZERO_RESULT_CACHE_MB"
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_MB = 64
+
+_results = collections.OrderedDict()  # chave -> (resultado, bytes), do menos ao mais recente
+_results_lock = threading.Lock()
+_results_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+
+def max_entries():
+    return int(os.environ.get(MAX_ENTRIES_ENV) or DEFAULT_MAX_ENTRIES)
+
+
+def max_bytes():
+    return int(float(os.environ.get(MAX_MB_ENV) or DEFAULT_MAX_MB) * 2**20)
+
+
+def normalize(filters):
+    # Os filtros das páginas são aplicados com isin: a ordem em que as opções de um
+    # multiselect foram marcadas não muda o resultado, então cada lista (o valor de
+    # um multiselect) vira uma tupla ordenada e sem repetições. Tuplas, como a
+    # janela do mapa, ficam como estão.
+    return tuple(
+        tuple(sorted(set(value))) if isinstance(value, (list, set)) else value
+        for value in filters
+    )
+
+
+def result_key(name, filters, file_path=RAW_DATA_PATH):
+    return name, normalize(filters), dataset_version(file_path)
+
+
+def cached_result(name, filters, compute, file_path=RAW_DATA_PATH):
+    # Devolve o resultado em cache para (name, filters) na versão atual do dataset,
+    # chamando compute() só quando ele não está no cache. filters: tupla com os
+    # valores dos filtros de que o resultado depende.
+    key = result_key(name, filters, file_path)
+    with _results_lock:
+        entry = _results.get(key)
+        if entry is not None:
+            _results.move_to_end(key)
+            _results_stats["hits"] += 1
+            return entry[0]
+        _results_stats["misses"] += 1
+
+    # O cálculo é feito fora do lock: sessões com filtros diferentes não esperam
+    # umas pelas outras. Duas sessões com a mesma chave podem calcular o mesmo
+    # resultado ao mesmo tempo; a segunda apenas substitui a primeira.
+    with span("result_miss:" + name):
+        result = compute()
+    store(key, result)
+    return result
+
+
+def store(key, result):
+    size = deep_size(result)
+    limit_entries, limit_bytes = max_entries(), max_bytes()
+    if limit_entries <= 0 or size > limit_bytes:
+        return
+    with _results_lock:
+        previous = _results.pop(key, None)
+        if previous is not None:
+            _results_stats["bytes"] -= previous[1]
+        _results[key] = (result, size)
+        _results_stats["bytes"] += size
+        while len(_results) > limit_entries or _results_stats["bytes"] > limit_bytes:
+            _, (_, evicted) = _results.popitem(last=False)
+            _results_stats["bytes"] -= evicted
+            _results_stats["evictions"] += 1
+
+
+def result_cache_info():
+    with _results_lock:
+        hits, misses = _results_stats["hits"], _results_stats["misses"]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "evictions": _results_stats["evictions"],
+            "entries": len(_results),
+            "bytes": _results_stats["bytes"],
+            "max_entries": max_entries(),
+            "max_bytes": max_bytes(),
+        }
+
@@ -0,0 +1,143 @@
+import numpy as np
+
+from utils.data import load_derived
+
+# Índice espacial para as consultas "restaurantes perto de mim".
+#
+# O mundo é dividido numa grade de CELL_DEGREES x CELL_DEGREES graus e as linhas
+# do dataset são guardadas ordenadas pelo número da célula (linha da grade *
+# colunas + coluna). Numa consulta por raio, cada faixa de latitude da grade
+# coberta pelo círculo vira um intervalo contíguo de células, localizado com
+# searchsorted; a distância haversine só é calculada para as linhas desses
+# intervalos. A consulta dos k mais próximos repete a consulta por raio,
+# dobrando o raio até encontrar k restaurantes. A nota de cada linha fica no
+# índice, na mesma ordem, para que o filtro de nota mínima olhe só os candidatos.
+
+EARTH_RADIUS_KM = 6371.0088
+
+CELL_DEGREES = 0.25  # ~28 km de latitude por célula
+
+GRID_ROWS = int(180 / CELL_DEGREES)
+GRID_COLUMNS = int(360 / CELL_DEGREES)
+
+# Raio inicial da busca dos k mais próximos.
+KNN_START_KM = 5.0
+
+MAX_DISTANCE_KM = np.pi * EARTH_RADIUS_KM  # meia volta: cobre o planeta inteiro
+
+
+def grid_cell(latitude, longitude):
+    row = np.clip(((np.asarray(latitude) + 90.0) // CELL_DEGREES).astype(np.int64), 0, GRID_ROWS - 1)
+    column = ((np.asarray(longitude) + 180.0) // CELL_DEGREES).astype(np.int64) % GRID_COLUMNS
+    return row, column
+
+
+def build_spatial(df):
+    latitude = df["latitude"].to_numpy(dtype=np.float64)
+    longitude = df["longitude"].to_numpy(dtype=np.float64)
+    row, column = grid_cell(latitude, longitude)
+    cells = row * GRID_COLUMNS + column
+    order = np.argsort(cells, kind="stable")
+    return {
+        "order": order,
+        "cells": cells[order],
+        "lat": np.radians(latitude[order]),
+        "lon": np.radians(longitude[order]),
+        "rating": df["aggregate_rating"].to_numpy(dtype=np.float64)[order],
+    }
+
+
+def load_spatial():
+    return load_derived("spatial", build_spatial)
+
+
+def build_city_centers(df):
+    # Centro (média das coordenadas) dos restaurantes de cada cidade, ponto inicial da página.
+    return (
+        df.loc[:, ["city", "latitude", "longitude"]]
+        .groupby("city", observed=True)
+        .mean()
+        .sort_index()
+    )
+
+
+def load_city_centers():
+    return load_derived("city_centers", build_city_centers)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    # Distância em km entre pontos dados em radianos.
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def cell_ranges(latitude, longitude, radius_km):
+    # Intervalos [início, fim] de células que cobrem o círculo, um ou dois por
+    # faixa de latitude (dois quando o círculo cruza o antimeridiano).
+    delta_lat = np.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = latitude - delta_lat, latitude + delta_lat
+    row0, _ = grid_cell(max(south, -90.0), 0.0)
+    row1, _ = grid_cell(min(north, 90.0), 0.0)
+
+    # Perto dos polos (ou com raio muito grande) o círculo cobre todas as longitudes.
+    widest = max(abs(south), abs(north))
+    if widest >= 90.0 or radius_km >= MAX_DISTANCE_KM / 2:
+        columns = [(0, GRID_COLUMNS - 1)]
+    else:
+        delta_lon = np.degrees(np.arcsin(min(np.sin(radius_km / EARTH_RADIUS_KM) / np.cos(np.radians(widest)), 1.0)))
+        if delta_lon >= 180.0 - CELL_DEGREES:
+            columns = [(0, GRID_COLUMNS - 1)]
+        else:
+            _, col0 = grid_cell(0.0, longitude - delta_lon)
+            _, col1 = grid_cell(0.0, longitude + delta_lon)
+            columns = [(col0, col1)] if col0 <= col1 else [(col0, GRID_COLUMNS - 1), (0, col1)]
+
+    return [
+        (row * GRID_COLUMNS + first, row * GRID_COLUMNS + last)
+        for row in range(int(row0), int(row1) + 1)
+        for first, last in columns
+    ]
+
+
+def candidates(spatial, latitude, longitude, radius_km):
+    # Posições (no índice) das linhas das células que cobrem o círculo.
+    cells = spatial["cells"]
+    slices = [
+        np.arange(np.searchsorted(cells, first, "left"), np.searchsorted(cells, last, "right"))
+        for first, last in cell_ranges(latitude, longitude, radius_km)
+    ]
+    return np.concatenate(slices) if slices else np.array([], dtype=np.int64)
+
+
+def within_radius(spatial, latitude, longitude, radius_km, selected=None, min_rating=None):
+    # (linhas do dataset, distâncias em km) dos restaurantes a até radius_km do
+    # ponto, ordenados pela distância. selected é uma máscara booleana opcional
+    # sobre as linhas do dataset (como a de utils.index.select_rows) e min_rating
+    # a nota mínima opcional.
+    positions = candidates(spatial, latitude, longitude, radius_km)
+    if min_rating is not None:
+        positions = positions[spatial["rating"][positions] >= min_rating]
+    rows = spatial["order"][positions]
+    if selected is not None:
+        keep = selected[rows]
+        positions, rows = positions[keep], rows[keep]
+
+    distances = haversine(
+        np.radians(latitude), np.radians(longitude), spatial["lat"][positions], spatial["lon"][positions]
+    )
+    inside = distances <= radius_km
+    rows, distances = rows[inside], distances[inside]
+    by_distance = np.lexsort((rows, distances))
+    return rows[by_distance], distances[by_distance]
+
+
+def nearest(spatial, latitude, longitude, k, selected=None, max_radius_km=MAX_DISTANCE_KM, min_rating=None):
+    # Os k restaurantes mais próximos do ponto (até max_radius_km). Todo
+    # restaurante a até r km está no resultado de within_radius(r), então assim
+    # que ele tem k linhas os k mais próximos estão entre elas.
+    radius_km = min(KNN_START_KM, max_radius_km)
+    while True:
+        rows, distances = within_radius(spatial, latitude, longitude, radius_km, selected, min_rating)
+        if len(rows) >= k or radius_km >= max_radius_km:
+            return rows[:k], distances[:k]
+        radius_km = min(radius_km * 2, max_radius_km)
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+from utils.data import decategorize, load_derived
+
+# Agregação espacial em vários níveis de zoom para o mapa de restaurantes.
+#
+# Para cada zoom de 0 a MAX_TILE_ZOOM o mundo é dividido na grade de tiles Web
+# Mercator do Leaflet, com cada tile subdividido em CELLS_PER_TILE x CELLS_PER_TILE
+# células. Cada célula guarda, por país e por color_name, somas mescláveis
+# (quantidade, soma das notas, soma das coordenadas), então a consulta de uma
+# janela do mapa só soma as células visíveis dos países selecionados.
+
+MAX_TILE_ZOOM = 12
+CELLS_PER_TILE = 4  # células de 64 px num tile de 256 px
+
+# Abaixo desta quantidade de restaurantes na janela o mapa mostra os marcadores individuais.
+MARKER_THRESHOLD = 1000
+
+MAX_LATITUDE = 85.0511287798  # limite da projeção Web Mercator
+
+WORLD_BOUNDS = ((-MAX_LATITUDE, -180.0), (MAX_LATITUDE, 180.0))
+
+
+def mercator(latitude, longitude):
+    # Coordenadas normalizadas em [0, 1): x cresce para leste e y para o sul, como nos tiles.
+    lat = np.radians(np.clip(latitude, -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(longitude) + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0
+    return np.clip(x, 0.0, np.nextafter(1.0, 0)), np.clip(y, 0.0, np.nextafter(1.0, 0))
+
+
+def grid_size(zoom):
+    return (2 ** zoom) * CELLS_PER_TILE
+
+
+def build_tiles(df):
+    x, y = mercator(df["latitude"].to_numpy(), df["longitude"].to_numpy())
+    base = pd.DataFrame({
+        "country": df["country"],
+        "color_name": df["color_name"],
+        "rating": df["aggregate_rating"],
+        "lat": df["latitude"],
+        "lon": df["longitude"],
+    })
+
+    levels = {}
+    for zoom in range(MAX_TILE_ZOOM + 1):
+        size = grid_size(zoom)
+        cells = base.assign(cx=(x * size).astype(np.int64), cy=(y * size).astype(np.int64))
+        levels[zoom] = (
+            cells.groupby(["country", "cx", "cy", "color_name"], observed=True)
+            .agg(
+                restaurants=("rating", "size"),
+                rating=("rating", "sum"),
+                lat=("lat", "sum"),
+                lon=("lon", "sum"),
+            )
+            .reset_index()
+        )
+    return levels
+
+
+TILE_KEYS = ["country", "cx", "cy", "color_name"]
+TILE_MEASURES = ["restaurants", "rating", "lat", "lon"]
+
+
+def update_tiles(tiles, delta):
+    # Atualização incremental (ver utils.incremental): em cada zoom, as somas das
+    # versões antigas das linhas alteradas (sign -1) são subtraídas e as das novas
+    # (sign +1) somadas; células sem restaurantes são removidas.
+    added = build_tiles(delta.loc[delta["sign"] > 0, :])
+    removed = build_tiles(delta.loc[delta["sign"] < 0, :])
+
+    levels = {}
+    for zoom, level in tiles.items():
+        negated = removed[zoom].assign(**{m: -removed[zoom][m] for m in TILE_MEASURES})
+        parts = [decategorize(frame) for frame in (level, added[zoom], negated)]
+        merged = pd.concat(parts, ignore_index=True).groupby(TILE_KEYS)[TILE_MEASURES].sum()
+        merged = merged.loc[merged["restaurants"] != 0, :].reset_index()
+        levels[zoom] = merged.astype({"country": "category", "color_name": "category"})
+    return levels
+
+
+def load_tiles():
+    return load_derived("tiles", build_tiles, update=update_tiles)
+
+
+def cell_range(bounds, zoom):
+    (south, west), (north, east) = bounds
+    x0, y1 = mercator(south, west)
+    x1, y0 = mercator(north, east)
+    size = grid_size(zoom)
+    return int(x0 * size), int(x1 * size), int(y0 * size), int(y1 * size)
+
+
+def viewport_cells(tiles, zoom, bounds, country_options):
+    # Células visíveis em bounds ((sul, oeste), (norte, leste)) no zoom atual,
+    # mescladas entre países e cores: quantidade, nota média, centróide e a cor
+    # mais frequente da célula.
+    zoom = int(min(max(zoom, 0), MAX_TILE_ZOOM))
+    cx0, cx1, cy0, cy1 = cell_range(bounds, zoom)
+    level = tiles[zoom]
+    visible = (
+        level["country"].isin(country_options)
+        & level["cx"].between(cx0, cx1)
+        & level["cy"].between(cy0, cy1)
+    )
+    cells = level.loc[visible, :]
+
+    by_color = cells.groupby(["cx", "cy", "color_name"], observed=True)["restaurants"].sum()
+    dominant = by_color.reset_index().sort_values("restaurants", ascending=False, kind="stable")
+    dominant = dominant.drop_duplicates(["cx", "cy"]).set_index(["cx", "cy"])["color_name"]
+
+    merged = cells.groupby(["cx", "cy"])[["restaurants", "rating", "lat", "lon"]].sum()
+    return pd.DataFrame({
+        "latitude": merged["lat"] / merged["restaurants"],
+        "longitude": merged["lon"] / merged["restaurants"],
+        "restaurants": merged["restaurants"],
+        "aggregate_rating": merged["rating"] / merged["restaurants"],
+        "color_name": dominant.reindex(merged.index).astype(str),
+    }).reset_index(drop=True)
+
+
+def viewport_rows(dataframe, bounds):
+    # Linhas de dataframe dentro de bounds.
+    (south, west), (north, east) = bounds
+    inside = dataframe["latitude"].between(south, north) & dataframe["longitude"].between(west, east)
+    return dataframe.loc[inside, :]
+
+
+def normalize_bounds(view):
+    # Converte o "bounds" devolvido pelo st_folium em ((sul, oeste), (norte, leste)),
+    # limitado ao mundo; sem interação ainda, usa o mundo todo.
+    bounds = (view or {}).get("bounds") or {}
+    south_west, north_east = bounds.get("_southWest") or {}, bounds.get("_northEast") or {}
+    if None in (south_west.get("lat"), south_west.get("lng"), north_east.get("lat"), north_east.get("lng")):
+        return WORLD_BOUNDS
+    (min_lat, min_lng), (max_lat, max_lng) = WORLD_BOUNDS
+    return (
+        (max(south_west["lat"], min_lat), max(south_west["lng"], min_lng)),
+        (min(north_east["lat"], max_lat), min(north_east["lng"], max_lng)),
+    )
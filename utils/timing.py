@@ -0,0 +1,153 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Medição do tempo de cada etapa de um rerun das páginas.
+#
+# Cada página chama start_rerun no início e finish_rerun no fim; entre os dois,
+# as etapas (leitura dos dados, agregações, montagem dos gráficos, mapa) ficam em
+# blocos `with span("nome"):`, que podem ser aninhados. O Streamlit executa cada
+# rerun numa thread, então os spans do rerun atual ficam numa variável local da
+# thread; fora de um rerun (ETL, benchmarks), span não registra nada.
+#
+# As páginas importam no topo só o streamlit e este módulo, e chamam start_rerun
+# logo em seguida. Os módulos de dados, o plotly, o folium e o streamlit_folium
+# são importados logo antes do trecho que os usa, depois do cabeçalho já
+# desenhado: na primeira execução do processo, o navegador mostra a página
+# enquanto esses imports e a leitura dos dados acontecem, e o tempo deles entra
+# no tempo total do rerun.
+#
+# Com o tracemalloc ligado (ver utils.memory), o rerun também guarda os maiores
+# alocadores: as linhas de código cuja memória alocada mais cresceu entre o
+# início e o fim do rerun.
+#
+# finish_rerun devolve o rerun medido (para os painéis de utils.debug) e, se as
+# variáveis de ambiente abaixo estiverem definidas, exporta os spans:
+#
+#   FOME_ZERO_TIMING_LOG         arquivo JSON lines, com uma linha por rerun
+#   FOME_ZERO_TIMING_PROMETHEUS  arquivo no formato de texto do Prometheus (para o
+#                                textfile collector do node_exporter), com a soma
+#                                e a contagem acumuladas por página e etapa em
+#                                todas as sessões do processo
+
+TIMING_LOG_ENV = "FOME_ZERO_TIMING_LOG"
+TIMING_PROMETHEUS_ENV = "FOME_ZERO_TIMING_PROMETHEUS"
+
+PROMETHEUS_METRIC = "fome_zero_span_seconds"
+
+# Span com o tempo total do rerun, exportado junto com as etapas.
+RERUN_SPAN = "rerun"
+
+TOP_ALLOCATIONS = 10
+
+_local = threading.local()
+
+_totals = {}
+_totals_lock = threading.Lock()
+
+
+def start_rerun(page):
+    snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+    _local.rerun = {
+        "page": page,
+        "started_at": time.time(),
+        "start": time.perf_counter(),
+        "spans": [],
+        "snapshot": snapshot,
+    }
+    _local.depth = 0
+
+
+@contextlib.contextmanager
+def span(name):
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        yield
+        return
+    record = {"name": name, "depth": _local.depth, "start_ms": (time.perf_counter() - rerun["start"]) * 1000}
+    rerun["spans"].append(record)
+    _local.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record["duration_ms"] = (time.perf_counter() - start) * 1000
+        _local.depth -= 1
+
+
+def finish_rerun():
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        return None
+    _local.rerun = None
+    result = {
+        "page": rerun["page"],
+        "started_at": rerun["started_at"],
+        "total_ms": (time.perf_counter() - rerun["start"]) * 1000,
+        "spans": rerun["spans"],
+        "allocations": top_allocations(rerun["snapshot"]),
+    }
+    export(result)
+    return result
+
+
+def top_allocations(before, limit=TOP_ALLOCATIONS):
+    if before is None or not tracemalloc.is_tracing():
+        return []
+    # O próprio tracemalloc fica de fora da comparação.
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    after = tracemalloc.take_snapshot().filter_traces(ignore)
+    stats = after.compare_to(before.filter_traces(ignore), "lineno")
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_diff_bytes": stat.size_diff,
+            "size_bytes": stat.size,
+            "count_diff": stat.count_diff,
+        }
+        for stat in sorted(stats, key=lambda stat: stat.size_diff, reverse=True)[:limit]
+    ]
+
+
+def export(rerun):
+    log_path = os.environ.get(TIMING_LOG_ENV)
+    if log_path:
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rerun) + "\n")
+
+    with _totals_lock:
+        measured = [(RERUN_SPAN, rerun["total_ms"])] + [(s["name"], s["duration_ms"]) for s in rerun["spans"]]
+        for name, duration_ms in measured:
+            total = _totals.setdefault((rerun["page"], name), [0, 0.0])
+            total[0] += 1
+            total[1] += duration_ms / 1000
+        prometheus_path = os.environ.get(TIMING_PROMETHEUS_ENV)
+        if prometheus_path:
+            write_prometheus(prometheus_path, _totals)
+
+
+def label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(totals):
+    lines = [
+        f"# HELP {PROMETHEUS_METRIC} Time spent in each stage of the dashboard page reruns.",
+        f"# TYPE {PROMETHEUS_METRIC} summary",
+    ]
+    for (page, name), (count, seconds) in sorted(totals.items()):
+        labels = f'page="{label(page)}",span="{label(name)}"'
+        lines.append(f"{PROMETHEUS_METRIC}_sum{{{labels}}} {seconds:.6f}")
+        lines.append(f"{PROMETHEUS_METRIC}_count{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path, totals):
+    # Arquivo temporário + rename: o coletor nunca lê um arquivo pela metade.
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(prometheus_text(totals))
+    os.replace(temporary, path)